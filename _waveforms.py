@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+자동 제어 패턴용 파형 생성기
+패턴 전체 구간의 틱별 속도/색상 값을 한 번에 계산합니다.
+
+numba가 설치되어 있으면 같은 커널을 JIT 컴파일하여 사용하고
+(컴파일 결과는 디스크에 캐시), 없으면 순수 Python으로 계산합니다.
+"""
+
+import math
+
+try:
+    import numpy as np
+    from numba import njit  # pip install numba (선택 사항)
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# 커널은 미리 할당된 출력 버퍼를 채우기만 하므로
+# Python 리스트와 numpy 배열 모두에 그대로 사용할 수 있습니다.
+def _dance_kernel(dt, vx, vy, vw, r, g, b):
+    """춤 패턴: 사인파 속도 + RGB 색상"""
+    for i in range(len(vx)):
+        t = i * dt
+        vx[i] = 0.3 * math.sin(t * 0.5)
+        vy[i] = 0.2 * math.cos(t * 0.3)
+        vw[i] = 0.5 * math.sin(t * 0.7)
+        r[i] = int(127 * (1 + math.sin(t * 2)))
+        g[i] = int(127 * (1 + math.cos(t * 1.5)))
+        b[i] = int(127 * (1 + math.sin(t * 3)))
+
+
+def _figure_eight_kernel(size, vx, vy, vw):
+    """8자 패턴: 한 바퀴(2π)를 샘플 수만큼 선형 분할"""
+    n = len(vx)
+    for i in range(n):
+        t = 2 * math.pi * i / n
+        vx[i] = size * 0.5 * math.cos(t)
+        vy[i] = size * 0.3 * math.sin(2 * t)
+        vw[i] = math.sin(t) * 0.5
+
+
+if NUMBA_AVAILABLE:
+    _dance_kernel = njit(cache=True, fastmath=True)(_dance_kernel)
+    _figure_eight_kernel = njit(cache=True, fastmath=True)(_figure_eight_kernel)
+
+    def _alloc(n: int, integer: bool = False):
+        return np.zeros(n, dtype=np.int64 if integer else np.float64)
+
+    def _to_list(buf) -> list:
+        return buf.tolist()
+else:
+    def _alloc(n: int, integer: bool = False):
+        return [0 if integer else 0.0] * n
+
+    def _to_list(buf) -> list:
+        return buf
+
+
+def dance_wave(n: int, dt: float):
+    """춤 패턴 n틱 분량 (틱 간격 dt초)
+
+    Returns:
+        (vx, vy, vw, r, g, b) 리스트 6개
+    """
+    out = (_alloc(n), _alloc(n), _alloc(n),
+           _alloc(n, True), _alloc(n, True), _alloc(n, True))
+    _dance_kernel(dt, *out)
+    return tuple(_to_list(buf) for buf in out)
+
+
+def figure_eight_wave(size: float, n: int):
+    """8자 패턴 한 바퀴를 n틱으로 나눈 속도
+
+    Returns:
+        (vx, vy, vw) 리스트 3개
+    """
+    out = (_alloc(n), _alloc(n), _alloc(n))
+    _figure_eight_kernel(size, *out)
+    return tuple(_to_list(buf) for buf in out)
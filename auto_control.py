@@ -10,10 +10,90 @@ Xtark R20 로봇 자동 제어 예제
 4. LED 효과와 함께 춤추기
 """
 
+import os
+import sys
 import time
 import math
 import threading
+from functools import lru_cache
 from xtark_r20_controller import XtarkR20Controller, RobotType
+from _waveforms import dance_wave, figure_eight_wave
+
+NS = 1_000_000_000  # 1초 (나노초)
+
+# 연속 패턴의 명령 갱신 주기 (Hz)
+PATTERN_HZ = 10
+
+# 사용자 정의 패턴의 궤적 샘플링 주기 (Hz)와 명령 간 가감속 시간 (초)
+CUSTOM_HZ = 50
+CUSTOM_RAMP = 0.15
+
+# 새 명령이 없어도 마지막 속도 명령을 다시 보내는 주기 (초)
+# _send가 같은 명령을 생략하므로, 명령 감시 타이머가 있는 펌웨어에서 패턴 도중 멈추지 않도록 함
+RESEND_PERIOD = 0.1
+
+# 속도 쓰기 스레드의 실시간 우선순위 (Linux SCHED_FIFO, 권한이 있을 때만 적용)
+WRITER_PRIORITY = 50
+
+
+class _CmdSlot:
+    """가장 최근 속도 명령 하나만 보관하는 슬롯 (패턴 루프 → 쓰기 스레드)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = (0.0, 0.0, 0.0)
+        self.changed = threading.Event()
+    
+    def update(self, vx: float, vy: float, vw: float):
+        """새 속도 명령 기록 (블로킹 없음)"""
+        with self._lock:
+            self._value = (vx, vy, vw)
+        self.changed.set()
+    
+    def take(self):
+        """최신 명령을 꺼내고 변경 플래그 해제"""
+        with self._lock:
+            self.changed.clear()
+            return self._value
+
+
+def _expand_commands(commands, dt: float, ramp: float):
+    """(vx, vy, vw, duration) 명령 목록을 dt 간격의 속도 궤적으로 전개
+    
+    각 구간은 직전 속도에서 ramp초 동안 선형으로 변한 뒤 유지되므로
+    명령이 바뀔 때 속도 계단이 생기지 않습니다. 구간의 끝은 누적 시간
+    기준 샘플로 정하므로 반올림 오차가 명령 수만큼 쌓이지 않습니다.
+    
+    Returns:
+        (궤적 [(vx, vy, vw), ...], 각 명령이 시작되는 샘플 인덱스 목록)
+    """
+    traj = []
+    starts = []
+    prev = (0.0, 0.0, 0.0)
+    end_time = 0.0
+    
+    for vx, vy, vw, duration in commands:
+        starts.append(len(traj))
+        target = (vx, vy, vw)
+        end_time += duration
+        steps = max(1, round(end_time / dt) - len(traj))
+        ramp_steps = max(1, round(ramp / dt))
+        
+        for i in range(1, steps + 1):
+            a = min(1.0, i / ramp_steps)
+            traj.append(tuple(p + (t - p) * a for p, t in zip(prev, target)))
+        
+        prev = traj[-1]
+    
+    return traj, starts
+
+
+@lru_cache(maxsize=8)
+def _figure_eight_profile(size: float, duration: float):
+    """8자 패턴의 틱별 속도 표 (같은 크기/시간으로 다시 실행하면 재사용)"""
+    vx, vy, vw = figure_eight_wave(size, math.ceil(duration * PATTERN_HZ))
+    return tuple(zip(vx, vy, vw))
+
 
 class AutoController:
     """자동 제어 클래스"""
@@ -21,6 +101,9 @@ class AutoController:
     def __init__(self, controller: XtarkR20Controller):
         self.controller = controller
         self.is_running = False
+        self._slot = _CmdSlot()
+        self._last_cmd = None
+        self._writer_thread = None
         
     def rectangle_pattern(self, size: float = 1.0, speed: float = 0.3):
         """사각형 경로 패턴"""
@@ -34,22 +117,16 @@ class AutoController:
                 
             print(f"변 {i+1}/4 이동 중...")
             
-            # 직진
-            self.controller.set_velocity(speed, 0.0, 0.0)
+            # 직진 후 정지
+            self._send(speed, 0.0, 0.0)
             time.sleep(side_time)
+            self._stop_and_settle(0.5)
             
-            # 정지
-            self.controller.set_velocity(0.0, 0.0, 0.0)
-            time.sleep(0.5)
-            
-            # 90도 회전
+            # 90도 회전 후 정지
             print("회전 중...")
-            self.controller.set_velocity(0.0, 0.0, math.pi/2)  # 90도/초
+            self._send(0.0, 0.0, math.pi/2)  # 90도/초
             time.sleep(1.0)
-            
-            # 정지
-            self.controller.set_velocity(0.0, 0.0, 0.0)
-            time.sleep(0.5)
+            self._stop_and_settle(0.5)
         
         print("사각형 패턴 완료")
     
@@ -64,12 +141,14 @@ class AutoController:
         
         print(f"선속도: {linear_speed:.2f}m/s, 각속도: {angular_speed:.2f}rad/s")
         
-        start_time = time.time()
-        while self.is_running and (time.time() - start_time) < duration:
-            self.controller.set_velocity(linear_speed, 0.0, angular_speed)
-            time.sleep(0.1)
+        send = self._send
         
-        self.controller.set_velocity(0.0, 0.0, 0.0)
+        def body(tick):
+            send(linear_speed, 0.0, angular_speed)
+        
+        self._run_at(PATTERN_HZ, math.ceil(duration * PATTERN_HZ), body)
+        
+        self._send(0.0, 0.0, 0.0)
         print("원형 패턴 완료")
     
     def zigzag_pattern(self, length: float = 2.0, width: float = 0.5, speed: float = 0.3):
@@ -86,17 +165,16 @@ class AutoController:
             print(f"지그재그 {i+1}/3")
             
             # 전진
-            self.controller.set_velocity(speed, 0.0, 0.0)
+            self._send(speed, 0.0, 0.0)
             time.sleep(forward_time)
             
             # 측면 이동
             side_direction = 1 if i % 2 == 0 else -1
-            self.controller.set_velocity(0.0, speed * side_direction, 0.0)
+            self._send(0.0, speed * side_direction, 0.0)
             time.sleep(side_time)
             
             # 정지
-            self.controller.set_velocity(0.0, 0.0, 0.0)
-            time.sleep(0.5)
+            self._stop_and_settle(0.5)
         
         print("지그재그 패턴 완료")
     
@@ -104,36 +182,28 @@ class AutoController:
         """춤 패턴 (LED 효과와 함께)"""
         print(f"춤 패턴 시작 (시간: {duration}초)")
         
-        start_time = time.time()
-        step = 0
+        # 반복 호출되는 함수는 지역 이름으로 묶어 속성 조회를 줄임
+        send = self._send
+        set_rgb = self.controller.set_rgb_light
+        beep = self.controller.beep
         
-        while self.is_running and (time.time() - start_time) < duration:
-            elapsed = time.time() - start_time
-            
-            # 속도 패턴 (사인파 기반)
-            vx = 0.3 * math.sin(elapsed * 0.5)
-            vy = 0.2 * math.cos(elapsed * 0.3)
-            vw = 0.5 * math.sin(elapsed * 0.7)
-            
-            self.controller.set_velocity(vx, vy, vw)
-            
-            # LED 효과
-            r = int(127 * (1 + math.sin(elapsed * 2)))
-            g = int(127 * (1 + math.cos(elapsed * 1.5)))
-            b = int(127 * (1 + math.sin(elapsed * 3)))
-            
-            self.controller.set_rgb_light(r, g, b)
+        # 사인파는 시간만의 함수이므로 틱별 속도/LED 값을 미리 계산
+        vx, vy, vw, r, g, b = dance_wave(math.ceil(duration * PATTERN_HZ), 1.0 / PATTERN_HZ)
+        vel_tab = list(zip(vx, vy, vw))
+        rgb_tab = list(zip(r, g, b))
+        
+        def body(tick):
+            send(*vel_tab[tick])
+            set_rgb(*rgb_tab[tick])
             
             # 부저 효과 (가끔)
-            if step % 50 == 0:
-                self.controller.set_beeper(True)
-                threading.Timer(0.1, lambda: self.controller.set_beeper(False)).start()
-            
-            step += 1
-            time.sleep(0.1)
+            if tick % 50 == 0:
+                beep(0.1)
+        
+        self._run_at(PATTERN_HZ, len(vel_tab), body)
         
         # 정지 및 LED 끄기
-        self.controller.set_velocity(0.0, 0.0, 0.0)
+        self._send(0.0, 0.0, 0.0)
         self.controller.set_rgb_light(0, 0, 0)
         print("춤 패턴 완료")
     
@@ -141,37 +211,123 @@ class AutoController:
         """8자 패턴"""
         print(f"8자 패턴 시작 (크기: {size}m, 시간: {duration}초)")
         
-        start_time = time.time()
+        vel_tab = _figure_eight_profile(size, duration)
+        send = self._send
         
-        while self.is_running and (time.time() - start_time) < duration:
-            elapsed = time.time() - start_time
-            
-            # 8자 궤적을 위한 파라미터
-            t = elapsed * 2 * math.pi / duration
-            
-            # 8자 형태의 속도 계산
-            vx = size * 0.5 * math.cos(t)
-            vy = size * 0.3 * math.sin(2 * t)
+        def body(tick):
+            send(*vel_tab[tick])
+        
+        self._run_at(PATTERN_HZ, len(vel_tab), body)
+        
+        self._send(0.0, 0.0, 0.0)
+        print("8자 패턴 완료")
+    
+    def custom_pattern(self, commands):
+        """사용자 정의 패턴 (명령 목록: [(vx, vy, vw, duration), ...])"""
+        # 각 명령 뒤에 0.5초 정지 구간을 두고 전체 궤적을 한 번에 전개
+        segments = []
+        for command in commands:
+            segments.append(command)
+            segments.append((0.0, 0.0, 0.0, 0.5))
+        
+        traj, starts = _expand_commands(segments, 1.0 / CUSTOM_HZ, CUSTOM_RAMP)
+        
+        # 명령 시작 샘플에서 진행 상황 출력 (정지 구간 제외)
+        labels = {}
+        for i, ((vx, vy, vw, duration), start) in enumerate(zip(commands, starts[::2]), 1):
+            labels[start] = f"명령 {i}/{len(commands)}: vx={vx}, vy={vy}, vw={vw}, {duration}초"
+        
+        def body(tick):
+            if tick in labels:
+                print(labels[tick])
+            self._send(*traj[tick])
+        
+        self._run_at(CUSTOM_HZ, len(traj), body)
+        
+        self._send(0.0, 0.0, 0.0)
+        print("사용자 정의 패턴 완료")
+    
+    def _send(self, vx: float, vy: float, vw: float):
+        """속도 명령 전달 (직전 명령과 같으면 생략)"""
+        cmd = (vx, vy, vw)
+        if cmd == self._last_cmd:
+            return
+        self._last_cmd = cmd
+        self._slot.update(vx, vy, vw)
+    
+    def _stop_and_settle(self, t: float):
+        """정지 명령 후 t초 대기 (쓰기 스레드를 거치므로 controller.stop_and_settle 대신 사용)"""
+        self._send(0.0, 0.0, 0.0)
+        time.sleep(t)
+    
+    def _run_at(self, hz: float, ticks: int, body):
+        """body(tick)를 hz 주기로 ticks번 실행 (tick = 0 .. ticks-1)
+        
+        매 주기의 데드라인을 시작 시각 기준 절대값(start + tick*dt)으로 계산하므로
+        body 실행 시간이나 스케줄링 지연이 누적되지 않습니다.
+        """
+        dt_ns = round(NS / hz)
+        start_ns = time.monotonic_ns()
+        
+        for tick in range(ticks):
+            if not self.is_running:
+                break
             
-            # 궤적에 따른 각속도
-            vw = math.sin(t) * 0.5
+            body(tick)
             
-            self.controller.set_velocity(vx, vy, vw)
-            time.sleep(0.1)
+            delay_ns = start_ns + (tick + 1) * dt_ns - time.monotonic_ns()
+            if delay_ns > 0:
+                time.sleep(delay_ns / NS)
+    
+    def _writer_loop(self):
+        """슬롯의 최신 속도 명령을 시리얼로 전송하는 쓰기 스레드"""
+        if hasattr(os, 'sched_setscheduler'):
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(WRITER_PRIORITY))
+            except (PermissionError, OSError):
+                pass  # 권한이 없으면 기본 스케줄러로 동작
         
-        self.controller.set_velocity(0.0, 0.0, 0.0)
-        print("8자 패턴 완료")
+        while self.is_running:
+            # 새 명령이 오면 바로, 없으면 RESEND_PERIOD마다 마지막 명령을 다시 전송
+            self._slot.changed.wait(timeout=RESEND_PERIOD)
+            if not self.is_running:
+                break
+            self.controller.set_velocity(*self._slot.take())
     
     def start(self):
         """자동 제어 시작"""
         self.is_running = True
+        self._last_cmd = None
+        self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
     
     def stop(self):
         """자동 제어 정지"""
         self.is_running = False
+        if self._writer_thread:
+            self._writer_thread.join(timeout=1.0)
+            self._writer_thread = None
+        self._slot.update(0.0, 0.0, 0.0)
+        self._last_cmd = (0.0, 0.0, 0.0)
         self.controller.set_velocity(0.0, 0.0, 0.0)
 
 
+def run_with_stop(auto_ctrl: AutoController, pattern, args):
+    """패턴 실행 (Ctrl+C 중단 처리, 종료 시 항상 정지)"""
+    auto_ctrl.start()
+    try:
+        pattern(auto_ctrl, *args)
+    except KeyboardInterrupt:
+        print("\n패턴 중단됨")
+    finally:
+        auto_ctrl.stop()
+
+
+def _with_stop(pattern):
+    """패턴 메서드를 run_with_stop으로 실행하는 메뉴 핸들러로 변환"""
+    return lambda auto_ctrl, *args: run_with_stop(auto_ctrl, pattern, args)
+
+
 def run_pattern_menu(controller: XtarkR20Controller):
     """패턴 선택 메뉴"""
     auto_ctrl = AutoController(controller)
@@ -180,13 +336,8 @@ def run_pattern_menu(controller: XtarkR20Controller):
         print("\n" + "="*40)
         print("  자동 제어 패턴 선택")
         print("="*40)
-        print("1. 사각형 패턴")
-        print("2. 원형 패턴")
-        print("3. 지그재그 패턴 (메카넘 휠만)")
-        print("4. 춤 패턴 (LED + 음악)")
-        print("5. 8자 패턴")
-        print("6. 사용자 정의 패턴")
-        print("7. 상태 모니터링")
+        for key, (name, *_) in PATTERN_MENU.items():
+            print(f"{key}. {name}")
         print("0. 종료")
         
         try:
@@ -194,73 +345,15 @@ def run_pattern_menu(controller: XtarkR20Controller):
             
             if choice == '0':
                 break
-            elif choice == '1':
-                size = float(input("사각형 크기 (m, 기본값: 1.0): ") or "1.0")
-                speed = float(input("이동 속도 (m/s, 기본값: 0.3): ") or "0.3")
-                
-                auto_ctrl.start()
-                try:
-                    auto_ctrl.rectangle_pattern(size, speed)
-                except KeyboardInterrupt:
-                    print("\n패턴 중단됨")
-                finally:
-                    auto_ctrl.stop()
-                    
-            elif choice == '2':
-                radius = float(input("원 반지름 (m, 기본값: 0.5): ") or "0.5")
-                duration = float(input("지속 시간 (초, 기본값: 10): ") or "10")
-                
-                auto_ctrl.start()
-                try:
-                    auto_ctrl.circle_pattern(radius, duration)
-                except KeyboardInterrupt:
-                    print("\n패턴 중단됨")
-                finally:
-                    auto_ctrl.stop()
-                    
-            elif choice == '3':
-                print("※ 메카넘 휠 로봇에서만 정상 동작합니다")
-                length = float(input("전진 거리 (m, 기본값: 2.0): ") or "2.0")
-                width = float(input("측면 거리 (m, 기본값: 0.5): ") or "0.5")
-                speed = float(input("이동 속도 (m/s, 기본값: 0.3): ") or "0.3")
-                
-                auto_ctrl.start()
-                try:
-                    auto_ctrl.zigzag_pattern(length, width, speed)
-                except KeyboardInterrupt:
-                    print("\n패턴 중단됨")
-                finally:
-                    auto_ctrl.stop()
-                    
-            elif choice == '4':
-                duration = float(input("춤 시간 (초, 기본값: 20): ") or "20")
-                
-                print(f"\n{duration}초간 춤을 춥니다! (Ctrl+C로 중단)")
-                auto_ctrl.start()
-                try:
-                    auto_ctrl.dance_pattern(duration)
-                except KeyboardInterrupt:
-                    print("\n댄스 중단됨")
-                finally:
-                    auto_ctrl.stop()
-                    
-            elif choice == '5':
-                size = float(input("8자 크기 (m, 기본값: 1.0): ") or "1.0")
-                duration = float(input("지속 시간 (초, 기본값: 16): ") or "16")
-                
-                auto_ctrl.start()
-                try:
-                    auto_ctrl.figure_eight_pattern(size, duration)
-                except KeyboardInterrupt:
-                    print("\n패턴 중단됨")
-                finally:
-                    auto_ctrl.stop()
-                    
-            elif choice == '6':
-                custom_pattern(controller)
-                
-            elif choice == '7':
-                monitor_status(controller)
+            elif choice in PATTERN_MENU:
+                name, handler, params, note, start_note = PATTERN_MENU[choice]
+                if note:
+                    print(note)
+                args = [float(input(f"{label} ({unit}, 기본값: {default}): ") or default)
+                        for label, unit, default in params]
+                if start_note:
+                    print(start_note.format(*args))
+                handler(auto_ctrl, *args)
                 
             else:
                 print("잘못된 선택입니다.")
@@ -271,8 +364,8 @@ def run_pattern_menu(controller: XtarkR20Controller):
             print("\n메뉴로 돌아갑니다.")
 
 
-def custom_pattern(controller: XtarkR20Controller):
-    """사용자 정의 패턴"""
+def custom_pattern(auto_ctrl: AutoController):
+    """사용자 정의 패턴 입력 및 실행"""
     print("\n사용자 정의 패턴 모드")
     print("명령 형식: vx,vy,vw,duration")
     print("예제: 0.3,0,0,2  (2초간 0.3m/s로 전진)")
@@ -306,16 +399,7 @@ def custom_pattern(controller: XtarkR20Controller):
     if commands:
         print(f"\n{len(commands)}개 명령 실행 시작...")
         
-        for i, (vx, vy, vw, duration) in enumerate(commands, 1):
-            print(f"명령 {i}/{len(commands)}: vx={vx}, vy={vy}, vw={vw}, {duration}초")
-            
-            controller.set_velocity(vx, vy, vw)
-            time.sleep(duration)
-            
-            controller.set_velocity(0, 0, 0)
-            time.sleep(0.5)
-        
-        print("사용자 정의 패턴 완료")
+        run_with_stop(auto_ctrl, AutoController.custom_pattern, [commands])
 
 
 def monitor_status(controller: XtarkR20Controller):
@@ -323,24 +407,48 @@ def monitor_status(controller: XtarkR20Controller):
     print("\n실시간 상태 모니터링 (Ctrl+C로 종료)")
     print("=" * 60)
     
+    period_ns = NS // 2
+    next_ns = time.monotonic_ns()
+    
     try:
         while True:
-            vel = controller.get_current_velocity()
-            odom = controller.get_odometry()
-            imu = controller.get_imu_data()
-            battery = controller.get_battery_voltage()
+            vel, odom, imu, battery = controller.get_telemetry_snapshot()
             
-            print(f"\r시간: {time.strftime('%H:%M:%S')} | "
-                  f"속도: vx={vel.vx:+.2f} vy={vel.vy:+.2f} vw={vel.vw:+.2f} | "
-                  f"위치: x={odom.x:+.2f} y={odom.y:+.2f} θ={odom.theta:+.2f} | "
-                  f"배터리: {battery:.1f}V", end="")
+            # 한 줄을 통째로 만들어 한 번에 출력 (\r로 같은 줄 덮어쓰기)
+            sys.stdout.write(f"\r시간: {time.strftime('%H:%M:%S')} | "
+                             f"속도: vx={vel.vx:+.2f} vy={vel.vy:+.2f} vw={vel.vw:+.2f} | "
+                             f"위치: x={odom.x:+.2f} y={odom.y:+.2f} θ={odom.theta:+.2f} | "
+                             f"배터리: {battery:.1f}V")
+            sys.stdout.flush()
             
-            time.sleep(0.5)
+            next_ns += period_ns
+            delay_ns = next_ns - time.monotonic_ns()
+            if delay_ns > 0:
+                time.sleep(delay_ns / NS)
             
     except KeyboardInterrupt:
         print("\n모니터링 종료")
 
 
+# 메뉴 번호 -> (이름, 핸들러(auto_ctrl, *입력값), [(입력 항목, 단위, 기본값), ...],
+#              입력 전 안내 문구, 시작 안내 문구(입력값으로 format))
+PATTERN_MENU = {
+    '1': ("사각형 패턴", _with_stop(AutoController.rectangle_pattern),
+          [("사각형 크기", "m", "1.0"), ("이동 속도", "m/s", "0.3")], None, None),
+    '2': ("원형 패턴", _with_stop(AutoController.circle_pattern),
+          [("원 반지름", "m", "0.5"), ("지속 시간", "초", "10")], None, None),
+    '3': ("지그재그 패턴 (메카넘 휠만)", _with_stop(AutoController.zigzag_pattern),
+          [("전진 거리", "m", "2.0"), ("측면 거리", "m", "0.5"), ("이동 속도", "m/s", "0.3")],
+          "※ 메카넘 휠 로봇에서만 정상 동작합니다", None),
+    '4': ("춤 패턴 (LED + 음악)", _with_stop(AutoController.dance_pattern),
+          [("춤 시간", "초", "20")], None, "\n{0}초간 춤을 춥니다! (Ctrl+C로 중단)"),
+    '5': ("8자 패턴", _with_stop(AutoController.figure_eight_pattern),
+          [("8자 크기", "m", "1.0"), ("지속 시간", "초", "16")], None, None),
+    '6': ("사용자 정의 패턴", custom_pattern, [], None, None),
+    '7': ("상태 모니터링", lambda auto_ctrl: monitor_status(auto_ctrl.controller), [], None, None),
+}
+
+
 def main():
     """메인 함수"""
     print("=" * 50)
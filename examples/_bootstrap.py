@@ -0,0 +1,18 @@
+"""
+예제 공통 import 도우미
+상위 디렉토리(xtark_r20_controller.py 위치)를 모듈 검색 경로에 추가하고
+컨트롤러 모듈의 주요 이름을 다시 내보냅니다.
+
+사용법 (examples/ 안의 스크립트에서):
+    from _bootstrap import XtarkR20Controller, RobotType
+"""
+
+import os
+import sys
+
+# 상위 디렉토리의 모듈 import를 위한 경로 추가
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xtark_r20_controller import XtarkR20Controller, RobotType, GRAVITY
+
+__all__ = ['XtarkR20Controller', 'RobotType', 'GRAVITY']
@@ -5,13 +5,8 @@ Xtark R20 기본 사용 예제
 """
 
 import time
-import sys
-import os
 
-# 상위 디렉토리의 모듈 import를 위한 경로 추가
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from xtark_r20_controller import XtarkR20Controller, RobotType
+from _bootstrap import XtarkR20Controller, RobotType
 
 def basic_movement_demo(robot: XtarkR20Controller):
     """기본 움직임 데모"""
@@ -24,8 +19,7 @@ def basic_movement_demo(robot: XtarkR20Controller):
     
     # 정지
     print("정지")
-    robot.set_velocity(0.0, 0.0, 0.0)
-    time.sleep(1.0)
+    robot.stop_and_settle(1.0)
     
     # 후진
     print("후진 중...")
@@ -33,8 +27,7 @@ def basic_movement_demo(robot: XtarkR20Controller):
     time.sleep(2.0)
     
     # 정지
-    robot.set_velocity(0.0, 0.0, 0.0)
-    time.sleep(1.0)
+    robot.stop_and_settle(1.0)
     
     # 좌회전
     print("좌회전 중...")
@@ -42,8 +35,7 @@ def basic_movement_demo(robot: XtarkR20Controller):
     time.sleep(1.5)
     
     # 정지
-    robot.set_velocity(0.0, 0.0, 0.0)
-    time.sleep(1.0)
+    robot.stop_and_settle(1.0)
     
     # 우회전
     print("우회전 중...")
@@ -51,8 +43,7 @@ def basic_movement_demo(robot: XtarkR20Controller):
     time.sleep(1.5)
     
     # 정지
-    robot.set_velocity(0.0, 0.0, 0.0)
-    time.sleep(1.0)
+    robot.stop_and_settle(1.0)
 
 def side_movement_demo(robot: XtarkR20Controller):
     """측면 이동 데모 (메카넘/옴니 휠만)"""
@@ -65,8 +56,7 @@ def side_movement_demo(robot: XtarkR20Controller):
     time.sleep(2.0)
     
     # 정지
-    robot.set_velocity(0.0, 0.0, 0.0)
-    time.sleep(1.0)
+    robot.stop_and_settle(1.0)
     
     # 우측 이동
     print("우측 이동 중...")
@@ -74,8 +64,7 @@ def side_movement_demo(robot: XtarkR20Controller):
     time.sleep(2.0)
     
     # 정지
-    robot.set_velocity(0.0, 0.0, 0.0)
-    time.sleep(1.0)
+    robot.stop_and_settle(1.0)
     
     # 대각선 이동
     print("대각선 이동 중...")
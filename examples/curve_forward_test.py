@@ -1,13 +1,6 @@
 import time
-import sys
-import os
 
-try:
-    from xtark_r20_controller import XtarkR20Controller, RobotType
-except ImportError:
-    # 경로가 다른 경우를 대비하여 상위 폴더를 추가
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from xtark_r20_controller import XtarkR20Controller, RobotType
+from _bootstrap import XtarkR20Controller, RobotType
 
 # 로봇 모델과 포트를 실제 환경에 맞게 수정하세요.
 ROBOT_MODEL = RobotType.R20_FWD
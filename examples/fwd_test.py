@@ -8,15 +8,7 @@ import sys
 import time
 import os
 
-# 상위 디렉토리의 모듈 import를 위한 경로 추가
-# 이 스크립트가 xtark_r20_controller.py와 같은 폴더에 있다면 이 부분은 필요 없습니다.
-# 하지만 다른 폴더에 있다면 경로를 맞게 설정해야 합니다.
-try:
-    from xtark_r20_controller import XtarkR20Controller, RobotType
-except ImportError:
-    # 경로가 다른 경우를 대비하여 상위 폴더를 추가
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from xtark_r20_controller import XtarkR20Controller, RobotType
+from _bootstrap import XtarkR20Controller, RobotType
 
 
 def run_test_sequence(controller: XtarkR20Controller, duration: float = 3.0, speed: float = 0.3):
@@ -38,8 +30,7 @@ def run_test_sequence(controller: XtarkR20Controller, duration: float = 3.0, spe
         
         # 정지
         print("   ⏹️  정지 (1초)")
-        controller.set_velocity(0.0, 0.0, 0.0)
-        time.sleep(1.0)
+        controller.stop_and_settle(1.0)
         
         # 2. 후진
         print(f"2. ⬇️  후진 ({duration}초)")
@@ -48,8 +39,7 @@ def run_test_sequence(controller: XtarkR20Controller, duration: float = 3.0, spe
         
         # 정지
         print("   ⏹️  정지 (1초)")
-        controller.set_velocity(0.0, 0.0, 0.0)
-        time.sleep(1.0)
+        controller.stop_and_settle(1.0)
         
         # 3. 좌로 회전 (제자리 회전)
         # FWD 모델은 vy(좌우 이동)가 없으므로 vw(각속도)를 사용합니다.
@@ -59,16 +49,14 @@ def run_test_sequence(controller: XtarkR20Controller, duration: float = 3.0, spe
         
         # 정지
         print("   ⏹️  정지 (1초)")
-        controller.set_velocity(0.0, 0.0, 0.0)
-        time.sleep(1.0)
+        controller.stop_and_settle(1.0)
         
         # 4. 우로 회전 (제자리 회전)
         print(f"4. ↩️  우로 회전 ({duration}초)")
         controller.set_velocity(0.0, 0.0, -speed * 1.5)
         time.sleep(duration)
         
-        # 최종 정지
-        controller.set_velocity(0.0, 0.0, 0.0)
+        # 최종 정지는 finally 블록에서 한 번만 전송
         print("\n✅ 테스트 시퀀스 완료!")
         
     except KeyboardInterrupt:
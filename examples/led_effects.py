@@ -4,83 +4,171 @@ Xtark R20 LED 효과 예제
 다양한 LED 패턴과 효과를 보여줍니다.
 """
 import sys
-import os
 import time
 import math
+import itertools
 import random
+import threading
+import colorsys
 
-# 상위 디렉토리의 모듈 import를 위한 경로 추가
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _bootstrap import XtarkR20Controller, RobotType
 
-from xtark_r20_controller import XtarkR20Controller, RobotType
+NS = 1_000_000_000  # 1초 (나노초)
+
+# 색상환 변환표: hue(0~359도) -> (r, g, b), 채도/명도 최대
+_RAINBOW = tuple(
+    tuple(int(c * 255) for c in colorsys.hsv_to_rgb(h / 360.0, 1.0, 1.0))
+    for h in range(360)
+)
+
+class FirmwareEffect:
+    """컨트롤러 내장 조명 효과 핸들 (duration초 후 off(self)를 호출하는 타이머)"""
+    def __init__(self, off, duration: float):
+        self._timer = threading.Timer(duration, off, (self,))
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def join(self, timeout: float = None):
+        """효과가 끝날 때까지 대기"""
+        self._timer.join(timeout)
+    
+    def cancel(self):
+        """예약된 LED 끄기 취소 (다른 효과로 바로 넘어갈 때)"""
+        self._timer.cancel()
 
 class LEDEffects:
     """LED 효과 클래스"""
     def __init__(self, controller: XtarkR20Controller):
         self.controller = controller
+        self._last_rgb = None  # 마지막으로 보낸 (r, g, b, mode)
+        self._effect = None    # 끄기가 예약된 내장 효과 (FirmwareEffect)
+        self._rgb_lock = threading.RLock()  # 효과 종료 타이머와 _last_rgb 공유
+    
+    def _rgb(self, r: int, g: int, b: int, mode: int = 1):
+        """RGB LED 설정 (직전에 보낸 값과 같으면 생략, 예약된 효과 끄기는 취소)"""
+        cmd = (r, g, b, mode)
+        with self._rgb_lock:
+            self._cancel_effect()
+            if cmd == self._last_rgb:
+                return
+            self._last_rgb = cmd
+            self.controller.set_rgb_light(r, g, b, mode=mode)
+    
+    def _cancel_effect(self):
+        """예약된 내장 효과 끄기 취소 (새 효과나 색상이 시작될 때)"""
+        if self._effect:
+            self._effect.cancel()
+            self._effect = None
+    
+    def _start_effect(self, r: int, g: int, b: int, mode: int, duration: float) -> FirmwareEffect:
+        """내장 효과를 켜고 duration초 후 끄기를 예약"""
+        with self._rgb_lock:
+            self._rgb(r, g, b, mode=mode)
+            self._effect = FirmwareEffect(self._end_effect, duration)
+            return self._effect
+    
+    def _end_effect(self, effect: FirmwareEffect):
+        """효과 타이머 만료 시 LED 끄기 (그 사이 다른 효과가 시작되었으면 무시)"""
+        with self._rgb_lock:
+            if self._effect is effect:
+                self._led_off()
+    
+    def _led_off(self):
+        """LED 끄기"""
+        self._rgb(0, 0, 0)
     
     def rainbow_cycle(self, duration: float = 5.0):
         """무지개 색상 순환"""
         print("🌈 무지개 효과 시작...")
-        start_time = time.time()
+        set_rgb = self._rgb
+        now_ns = time.monotonic_ns
+        start_ns = now_ns()
+        duration_ns = int(duration * NS)
         
-        while time.time() - start_time < duration:
-            # 현재 시간을 기반으로 색상 계산 (HSV -> RGB)
-            hue = (time.time() - start_time) / duration * 360
-            r, g, b = self._hsv_to_rgb(hue, 1.0, 1.0)
+        while True:
+            elapsed_ns = now_ns() - start_ns
+            if elapsed_ns >= duration_ns:
+                break
             
-            self.controller.set_rgb_light(r, g, b)
+            # 현재 시간을 기반으로 색상 선택 (HSV -> RGB 변환표)
+            set_rgb(*_RAINBOW[elapsed_ns * 360 // duration_ns % 360])
             time.sleep(0.05)  # 20Hz 업데이트
         
         print("무지개 효과 완료")
     
-    def breathing_effect(self, color: tuple = (0, 0, 255), duration: float = 4.0):
-        """호흡 효과 (컨트롤러 내장 기능 사용)"""
+    def breathing_effect(self, color: tuple = (0, 0, 255), duration: float = 4.0,
+                         wait: bool = True) -> FirmwareEffect:
+        """호흡 효과 (컨트롤러 내장 기능 사용)
+        
+        효과는 펌웨어가 실행하므로 wait=False이면 바로 반환합니다.
+        반환된 핸들의 join()으로 종료를 기다릴 수 있습니다.
+        """
         print(f"💨 호흡 효과 시작... 색상: RGB{color}")
         r, g, b = color
         # PDF p.24, mode 0x02는 호흡 효과 
-        self.controller.set_rgb_light(r, g, b, mode=2)
-        time.sleep(duration)
-        print("호흡 효과 완료")
+        effect = self._start_effect(r, g, b, 2, duration)
+        if wait:
+            effect.join()
+            print("호흡 효과 완료")
+        return effect
     
     def strobe_effect(self, color: tuple = (255, 255, 255), strobe_count: int = 10):
         """스트로브 효과"""
         print(f"⚡ 스트로브 효과 시작... 색상: RGB{color}, 횟수: {strobe_count}")
         r, g, b = color
         
-        for i in range(strobe_count):
-            # 켜기
-            self.controller.set_rgb_light(r, g, b)
-            time.sleep(0.1)
-            
-            # 끄기
-            self.controller.set_rgb_light(0, 0, 0)
-            time.sleep(0.1)
+        # 켜기/끄기 패킷은 한 번만 만들고 0.1초 간격 데드라인마다 번갈아 전송
+        frames = (self.controller.rgb_light_packet(r, g, b),
+                  self.controller.rgb_light_packet(0, 0, 0))
+        write = self.controller.write_packet
+        step_ns = NS // 10
+        with self._rgb_lock:
+            self._cancel_effect()
+        start_ns = time.monotonic_ns()
+        
+        for i in range(strobe_count * 2):
+            write(frames[i % 2])
+            delay_ns = start_ns + (i + 1) * step_ns - time.monotonic_ns()
+            if delay_ns > 0:
+                time.sleep(delay_ns / NS)
+        
+        if strobe_count > 0:
+            with self._rgb_lock:
+                self._last_rgb = (0, 0, 0, 1)  # 마지막 프레임은 꺼짐
         
         print("스트로브 효과 완료")
     
-    def police_lights(self, duration: float = 5.0):
-        """경찰차 라이트 효과 (컨트롤러 내장 기능 사용)"""
+    def police_lights(self, duration: float = 5.0, wait: bool = True) -> FirmwareEffect:
+        """경찰차 라이트 효과 (컨트롤러 내장 기능 사용)
+        
+        wait=False이면 바로 반환합니다 (breathing_effect 참조).
+        """
         print("🚔 경찰차 라이트 효과 시작...")
         # PDF p.24, mode 0x04는 경광등 효과 
-        self.controller.set_rgb_light(0, 0, 0, mode=4)
-        time.sleep(duration)
-        print("경찰차 라이트 효과 완료")
+        effect = self._start_effect(0, 0, 0, 4, duration)
+        if wait:
+            effect.join()
+            print("경찰차 라이트 효과 완료")
+        return effect
     
     def fire_effect(self, duration: float = 4.0):
         """불 효과 (빨간색-주황색 랜덤)"""
         print("🔥 불 효과 시작...")
-        start_time = time.time()
+        start_ns = time.monotonic_ns()
+        duration_ns = int(duration * NS)
+        
+        randint = random.randint
+        set_rgb = self._rgb
         
-        import random
+        # 빨간색을 기본으로 주황색 계열 랜덤 색상을 틱 수만큼 미리 생성
+        flames = [(randint(200, 255), randint(0, 100))
+                  for _ in range(math.ceil(duration / 0.1))]
         
-        while time.time() - start_time < duration:
-            # 빨간색을 기본으로 주황색 계열 랜덤 생성
-            r = random.randint(200, 255)
-            g = random.randint(0, 100)
-            b = 0
+        for r, g in flames:
+            if time.monotonic_ns() - start_ns >= duration_ns:
+                break
             
-            self.controller.set_rgb_light(r, g, b)
+            set_rgb(r, g, 0)
             time.sleep(0.1)
         
         print("불 효과 완료")
@@ -88,23 +176,25 @@ class LEDEffects:
     def party_mode(self, duration: float = 10.0):
         """파티 모드 (랜덤 색상 + 부저)"""
         print("🎉 파티 모드 시작...")
-        start_time = time.time()
+        start_ns = time.monotonic_ns()
+        duration_ns = int(duration * NS)
+        
+        randint, rand = random.randint, random.random
+        set_rgb = self._rgb
         
-        import random
+        # 틱별 랜덤 색상과 부저 여부(30% 확률)를 미리 생성
+        frames = [(randint(0, 255), randint(0, 255), randint(0, 255), rand() < 0.3)
+                  for _ in range(math.ceil(duration / 0.2))]
         
-        while time.time() - start_time < duration:
-            # 랜덤 색상
-            r = random.randint(0, 255)
-            g = random.randint(0, 255)
-            b = random.randint(0, 255)
+        for r, g, b, beep in frames:
+            if time.monotonic_ns() - start_ns >= duration_ns:
+                break
             
-            self.controller.set_rgb_light(r, g, b)
+            set_rgb(r, g, b)
             
-            # 가끔 부저 울리기
-            if random.random() < 0.3:  # 30% 확률
-                self.controller.set_beeper(True)
-                time.sleep(0.1)
-                self.controller.set_beeper(False)
+            # 가끔 부저 울리기 (컨트롤러의 부저 작업 스레드가 처리하므로 LED 루프를 막지 않음)
+            if beep:
+                self.controller.beep(0.1)
             
             time.sleep(0.2)
         
@@ -113,7 +203,8 @@ class LEDEffects:
     def color_wave(self, duration: float = 6.0):
         """색상 웨이브 효과"""
         print("🌊 색상 웨이브 효과 시작...")
-        start_time = time.time()
+        deadline_ns = time.monotonic_ns() + int(duration * NS)
+        set_rgb = self._rgb
         
         colors = [
             (255, 0, 0),    # 빨간색
@@ -125,22 +216,15 @@ class LEDEffects:
             (148, 0, 211),  # 보라색
         ]
         
-        while time.time() - start_time < duration:
-            for color in colors:
-                if time.time() - start_time >= duration:
-                    break
-                
-                r, g, b = color
-                self.controller.set_rgb_light(r, g, b)
-                time.sleep(0.3)
+        for color in itertools.cycle(colors):
+            remaining_ns = deadline_ns - time.monotonic_ns()
+            if remaining_ns <= 0:
+                break
+            
+            set_rgb(*color)
+            time.sleep(min(0.3, remaining_ns / NS))
         
         print("색상 웨이브 효과 완료")
-    
-    def _hsv_to_rgb(self, h: float, s: float, v: float) -> tuple:
-        """HSV를 RGB로 변환"""
-        import colorsys
-        r, g, b = colorsys.hsv_to_rgb(h / 360.0, s, v)
-        return int(r * 255), int(g * 255), int(b * 255)
 
 def show_menu():
     """메뉴 표시"""
@@ -213,20 +297,20 @@ def main():
                 led_effects.color_wave(3.0)
                 print("🎪 모든 효과 완료!")
             elif choice == '9':
-                controller.set_rgb_light(0, 0, 0)
+                led_effects._rgb(0, 0, 0)
                 print("💡 LED 꺼짐")
             else:
                 print("잘못된 선택입니다.")
             
             # LED 끄기
-            controller.set_rgb_light(0, 0, 0)
+            led_effects._rgb(0, 0, 0)
             time.sleep(0.5)
     
     except KeyboardInterrupt:
         print("\n\n프로그램 종료 중...")
     finally:
         # LED 끄기
-        controller.set_rgb_light(0, 0, 0)
+        led_effects._rgb(0, 0, 0)
         controller.disconnect()
         print("프로그램 종료됨")
 
@@ -4,107 +4,427 @@ Xtark R20 센서 데이터 모니터링 예제
 실시간으로 센서 데이터를 출력합니다.
 """
 
-import sys
 import os
+import sys
 import time
+import atexit
+import struct
+import ctypes
+import argparse
 import threading
-# from xtark_r20_controller import XtarkR20Controller, RobotType, GRAVITY
-# 부모 디렉토리를 Python 경로에 추가
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import multiprocessing
+from typing import Optional, Tuple
+
+try:
+    from multiprocessing import shared_memory  # Python 3.8+
+    SHARED_MEMORY_AVAILABLE = True
+except ImportError:
+    SHARED_MEMORY_AVAILABLE = False
 
 try:
-    from xtark_r20_controller import XtarkR20Controller, RobotType, GRAVITY
+    from _bootstrap import XtarkR20Controller, RobotType, GRAVITY
 except ImportError as e:
     print(f"Error importing xtark_r20_controller: {e}")
     print("Please make sure you're running this from the python_controller directory")
     print("or install the package using: python setup.py install")
     sys.exit(1)
 
+# 배터리 전압 범위 (PDF p15): 9.84V (0%) ~ 12.6V (100%) [cite: 621]
+_V_MIN, _V_SPAN = 9.84, 12.6 - 9.84
+# 5% 단위 배터리 막대 (0칸 ~ 20칸)
+_BARS = tuple("█" * i + "░" * (20 - i) for i in range(21))
+
+# 터미널 대체 화면 전환 (스크롤 기록을 남기지 않고 같은 자리에 다시 그림)
+_ALT_SCREEN_ON = "\033[?1049h\033[?25l"   # 대체 화면 + 커서 숨김
+_ALT_SCREEN_OFF = "\033[?25h\033[?1049l"  # 커서 표시 + 원래 화면
+
+# 모니터 프레임(os.write)과 다른 출력이 섞이지 않도록 보호
+stdout_lock = threading.Lock()
+
+def _write_fd(fd: int, data: bytes):
+    """파이썬 출력 버퍼를 거치지 않고 fd에 직접 쓰기 (부분 쓰기 처리)"""
+    with stdout_lock:
+        sys.stdout.flush()  # 버퍼에 남은 print 출력을 먼저 내보냄
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+# --realtime 사용 시 모니터 스레드의 SCHED_RR 우선순위
+MONITOR_PRIORITY = 20
+_MCL_CURRENT, _MCL_FUTURE = 1, 2  # <sys/mman.h> (Linux)
+
+_M_TRIM_THRESHOLD, _M_MMAP_MAX = -1, -4  # <malloc.h> mallopt 옵션 (glibc)
+_PREFAULT_BYTES = 1 << 20  # 미리 확보해 둘 힙 크기
+
+def _lock_memory():
+    """프로세스 메모리를 RAM에 고정하고 힙을 미리 확보 (페이지 폴트 지연 방지, 권한 필요)"""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.mlockall(_MCL_CURRENT | _MCL_FUTURE) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+    except (OSError, AttributeError) as e:
+        print(f"경고: 메모리 잠금 실패 ({e})")
+        return
+    # 해제한 힙을 OS에 돌려주지 않게 하여 아래에서 미리 확보한 페이지가 계속 잠겨 있도록 함
+    if hasattr(libc, 'mallopt'):
+        libc.mallopt(_M_TRIM_THRESHOLD, -1)
+        libc.mallopt(_M_MMAP_MAX, 0)
+    buf = bytearray(_PREFAULT_BYTES)  # 0으로 채우며 페이지 할당
+    del buf
+
+# spawn_process 공유 메모리 레이아웃: 시퀀스 번호(홀수면 기록 중) +
+# x, y, θ, vx, vy, vw, ax, ay, az, gx, gy, gz, 배터리 (float32) + 기록 시각 (float64)
+_SHM_SEQ = struct.Struct('<I')
+_SHM_DATA = struct.Struct('<13fd')
+SHM_SIZE = _SHM_SEQ.size + _SHM_DATA.size
+# 이 프로세스가 spawn_process로 만든 공유 메모리 이름 (attach 시 추적 해제 여부 판단)
+_owned_shm_names = set()
+
+class SharedTelemetry:
+    """공유 메모리에 게시된 최신 텔레메트리 읽기 핸들
+
+    SensorMonitor.spawn_process()가 반환하며, 다른 프로세스에서는
+    SharedTelemetry.attach(name)으로 같은 메모리에 연결할 수 있습니다.
+    """
+    FIELDS = ('x', 'y', 'theta', 'vx', 'vy', 'vw',
+              'accel_x', 'accel_y', 'accel_z', 'gyro_x', 'gyro_y', 'gyro_z',
+              'battery', 'stamp')
+
+    READ_RETRIES = 1000  # 기록 중인 값을 다시 읽는 최대 횟수
+
+    def __init__(self, shm, process=None, stop_event=None):
+        self.shm = shm
+        self.process = process
+        self._stop_event = stop_event
+        self._last = None  # 마지막으로 일관되게 읽은 값
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedTelemetry':
+        """이름으로 기존 공유 메모리에 연결 (읽기 전용으로 사용)
+
+        메모리는 만든 쪽(spawn_process)이 삭제하므로, 읽는 프로세스가 종료될 때
+        resource_tracker가 대신 삭제하지 않도록 추적 대상에서 뺍니다.
+        만든 프로세스 자신이 연결할 때는 만든 쪽의 추적 항목이므로 그대로 둡니다.
+        """
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            from multiprocessing import resource_tracker
+            shm = shared_memory.SharedMemory(name=name)
+            if shm.name not in _owned_shm_names:
+                resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def read(self) -> Tuple[float, ...]:
+        """최신 값 읽기 (FIELDS 순서, stamp가 0이면 아직 기록 전)
+
+        기록 프로세스가 기록 도중 종료되어 시퀀스 번호가 홀수로 남으면
+        마지막으로 읽은 값을 반환합니다 (읽은 적이 없으면 TimeoutError).
+        """
+        buf = self.shm.buf
+        for _ in range(self.READ_RETRIES):
+            seq, = _SHM_SEQ.unpack_from(buf, 0)
+            values = _SHM_DATA.unpack_from(buf, _SHM_SEQ.size)
+            # 읽는 도중 기록이 없었을 때만 사용 (seqlock)
+            if not seq & 1 and _SHM_SEQ.unpack_from(buf, 0)[0] == seq:
+                self._last = values
+                return values
+        if self._last is None:
+            raise TimeoutError("공유 메모리 값을 일관되게 읽지 못했습니다 (기록 프로세스 중단?)")
+        return self._last
+
+    def close(self):
+        """연결 해제 (spawn_process로 만든 핸들이면 자식 프로세스 종료 및 메모리 삭제)"""
+        if self.process is not None:
+            self._stop_event.set()
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.shm.close()
+            self.shm.unlink()
+            _owned_shm_names.discard(self.shm.name)
+            self.process = None
+        else:
+            self.shm.close()
+
+def _monitor_process_main(port, robot_type, shm_name, stop_event, realtime, cpu):
+    """spawn_process 자식 프로세스 진입점"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        with XtarkR20Controller(port, robot_type=robot_type) as controller:
+            monitor = SensorMonitor(controller, realtime=realtime, cpu=cpu)
+            if cpu is not None:
+                monitor._pin_cpu(0)
+            if realtime:
+                monitor._apply_realtime(0)
+            monitor._publish_loop(shm.buf, stop_event)
+    except KeyboardInterrupt:
+        pass
+    except ConnectionError as e:
+        print(f"연결 오류: {e}")
+    finally:
+        shm.close()
+
 class SensorMonitor:
     """센서 데이터 모니터링 클래스"""
     
-    def __init__(self, controller: XtarkR20Controller):
+    def __init__(self, controller: XtarkR20Controller, realtime: bool = False,
+                 cpu: Optional[int] = None):
         self.controller = controller
+        self.realtime = realtime
+        self.cpu = cpu  # 모니터 스레드를 고정할 CPU 번호 (None이면 고정 안 함)
         self.is_running = False
         self.monitor_thread = None
+        self._period = 0.1  # 10Hz 업데이트
+        self._alt_screen = False
+        # 매 프레임 동일한 머리글은 한 번만 생성 (커서를 맨 위로 옮기고 아래를 지우는 ANSI escape code 포함)
+        self._header = ("\033[H\033[J" + "=" * 60 + "\n"
+                        "           Xtark R20 센서 데이터 모니터링\n" + "=" * 60 + "\n")
+        self._footer = "\n(Ctrl+C를 눌러 종료)\n"
+        self._encoding = getattr(sys.stdout, 'encoding', None) or 'utf-8'
+        self._header_b = self._header.encode(self._encoding, 'replace')
+        self._footer_b = self._footer.encode(self._encoding, 'replace')
     
     def start_monitoring(self):
         """모니터링 시작"""
         if self.is_running: return
+        if self.realtime:
+            # 실행 중 처음 실행되는 코드 경로가 없도록 프레임 생성을 한 번 미리 수행
+            snap = self.controller.get_telemetry_snapshot()
+            self._render_frame(snap.odom, snap.imu, snap.battery, snap.vel, "")
+        if sys.stdout.isatty():
+            self._enter_alt_screen()
         self.is_running = True
         self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.monitor_thread.start()
+        if self.cpu is not None:
+            self._pin_cpu(self.monitor_thread.native_id)
+        if self.realtime:
+            self._apply_realtime(self.monitor_thread.native_id)
         print("센서 모니터링 시작 (Ctrl+C로 종료)")
     
+    def _pin_cpu(self, tid: int):
+        """스레드 tid(0이면 현재 스레드)를 지정 CPU에 고정 (Linux)
+
+        효과를 높이려면 해당 코어를 커널 부팅 옵션으로 격리하세요:
+        isolcpus=<N> nohz_full=<N>
+        """
+        if not hasattr(os, 'sched_setaffinity'):
+            print("경고: 이 플랫폼은 CPU 고정을 지원하지 않습니다.")
+            return
+        try:
+            os.sched_setaffinity(tid, {self.cpu})
+        except OSError as e:
+            print(f"경고: CPU {self.cpu} 고정 실패 ({e})")
+    
+    def _apply_realtime(self, tid: int):
+        """스레드 tid(0이면 현재 스레드)를 SCHED_RR로 올리고 메모리 잠금 (Linux, 권한 없으면 경고만)"""
+        if not hasattr(os, 'sched_setscheduler'):
+            print("경고: 이 플랫폼은 실시간 스케줄링을 지원하지 않습니다.")
+            return
+        try:
+            os.sched_setscheduler(tid, os.SCHED_RR, os.sched_param(MONITOR_PRIORITY))
+        except PermissionError:
+            print("경고: 실시간 우선순위 설정 권한이 없습니다.")
+            print("      sudo setcap cap_sys_nice+ep $(readlink -f $(which python3))")
+            print(f"      또는 sudo chrt -r {MONITOR_PRIORITY} python3 sensor_monitoring.py --realtime")
+            return
+        _lock_memory()
+    
+    @staticmethod
+    def spawn_process(port: str, robot_type: RobotType = RobotType.R20_MEC,
+                      realtime: bool = False, cpu: Optional[int] = None) -> SharedTelemetry:
+        """별도 프로세스에서 센서를 읽어 공유 메모리에 게시
+
+        자식 프로세스가 자체 컨트롤러로 포트를 열고 10Hz로 최신 값을 덮어씁니다.
+        모니터가 이 프로세스의 다른 스레드와 GIL을 다투지 않게 할 때 사용합니다.
+        """
+        if not SHARED_MEMORY_AVAILABLE:
+            raise RuntimeError("공유 메모리 모드는 Python 3.8 이상이 필요합니다.")
+        shm = shared_memory.SharedMemory(create=True, size=SHM_SIZE)
+        _owned_shm_names.add(shm.name)
+        stop_event = multiprocessing.Event()
+        process = multiprocessing.Process(
+            target=_monitor_process_main,
+            args=(port, robot_type, shm.name, stop_event, realtime, cpu),
+            daemon=True)
+        process.start()
+        return SharedTelemetry(shm, process, stop_event)
+
+    def _publish_loop(self, buf, stop_event):
+        """텔레메트리를 주기마다 공유 메모리에 기록 (spawn_process 자식 프로세스에서 실행)"""
+        pack_seq, pack_data, offset = _SHM_SEQ.pack_into, _SHM_DATA.pack_into, _SHM_SEQ.size
+        seq = 0
+        next_tick = time.monotonic()
+        while not stop_event.is_set():
+            _, odom, imu, battery = self.controller.get_telemetry_snapshot()
+            pack_seq(buf, 0, seq + 1)  # 홀수: 기록 중
+            pack_data(buf, offset,
+                      odom.x, odom.y, odom.theta, odom.vx, odom.vy, odom.vw,
+                      imu.accel_x, imu.accel_y, imu.accel_z,
+                      imu.gyro_x, imu.gyro_y, imu.gyro_z,
+                      battery, time.time())
+            seq = (seq + 2) & 0xFFFFFFFF
+            pack_seq(buf, 0, seq)
+            
+            next_tick += self._period
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                stop_event.wait(delay)
+            else:
+                next_tick = time.monotonic()  # 밀린 주기는 따라잡지 않음
+    
     def stop_monitoring(self):
         """모니터링 종료"""
         self.is_running = False
         if self.monitor_thread:
             self.monitor_thread.join(timeout=1.0)
+        self._leave_alt_screen()
+    
+    def _enter_alt_screen(self):
+        """터미널 대체 화면으로 전환 (비정상 종료 시에도 atexit로 복귀)"""
+        with stdout_lock:
+            sys.stdout.write(_ALT_SCREEN_ON)
+            sys.stdout.flush()
+        self._alt_screen = True
+        atexit.register(self._leave_alt_screen)
+    
+    def _leave_alt_screen(self):
+        """원래 화면으로 복귀 (여러 번 호출해도 한 번만 동작)"""
+        if not self._alt_screen: return
+        self._alt_screen = False
+        with stdout_lock:
+            sys.stdout.write(_ALT_SCREEN_OFF)
+            sys.stdout.flush()
+    
+    def _render_frame(self, odom, imu, battery: float, velocity, stamp: str) -> str:
+        """화면 한 프레임의 본문 문자열 생성 (머리글/꼬리글 제외)"""
+        # 배터리
+        battery_percent = max(0.0, min(100.0, (battery - _V_MIN) / _V_SPAN * 100))
+        battery_bar = _BARS[int(battery_percent) // 5]
+        return (
+            f"\n🔋 배터리: {battery:.2f}V [{battery_bar}] {battery_percent:.1f}%\n"
+            f"\n📍 오도메트리 (통합 속도 기반 추정):\n"
+            f"   위치 (x, y, θ): ({odom.x:6.3f} m, {odom.y:6.3f} m, {odom.theta:6.3f} rad)\n"
+            f"   속도 (vx, vy, vw): ({odom.vx:6.3f} m/s, {odom.vy:6.3f} m/s, {odom.vw:6.3f} rad/s)\n"
+            f"\n🧭 IMU (단위: m/s², rad/s):\n"
+            f"   가속도 (x,y,z): ({imu.accel_x:6.3f}, {imu.accel_y:6.3f}, {imu.accel_z-GRAVITY:6.3f})\n"
+            f"   각속도 (x,y,z): ({imu.gyro_x:6.3f}, {imu.gyro_y:6.3f}, {imu.gyro_z:6.3f})\n"
+            f"\n🎮 현재 제어 속도:\n"
+            f"   vx: {velocity.vx:.2f} m/s, vy: {velocity.vy:.2f} m/s, vw: {velocity.vw:.2f} rad/s\n"
+            f"{'-' * 60}\n"
+            f"⏰ 마지막 업데이트: {stamp}\n"
+        )
     
     def _monitor_loop(self):
-        """모니터링 루프"""
+        """모니터링 루프 (단조 시계 기준 절대 시각으로 주기 유지)"""
+        next_tick = time.monotonic()
+        stamp_sec, stamp = None, ""
+        minute_start, minute_prefix = 0, ""
+        try:
+            fd = sys.stdout.fileno()
+        except (AttributeError, OSError, ValueError):
+            fd = None  # 실제 파일이 아닌 stdout (IDE 콘솔 등)
+        encoding, header_b, footer_b = self._encoding, self._header_b, self._footer_b
         while self.is_running:
             try:
-                odom = self.controller.get_odometry()
-                imu = self.controller.get_imu_data()
-                battery = self.controller.get_battery_voltage()
-                velocity = self.controller.get_current_velocity()
-                
-                # 화면 지우기 (ANSI escape code)
-                print("\033[2J\033[H", end="")
-                
-                print("=" * 60)
-                print("           Xtark R20 센서 데이터 모니터링")
-                print("=" * 60)
-                
-                # 배터리
-                # PDF(p15) 기반 전압 범위: 9.84V (0%) ~ 12.6V (100%) [cite: 621]
-                battery_percent = max(0, min(100, (battery - 9.84) / (12.6 - 9.84) * 100))
-                battery_bar = "█" * int(battery_percent / 5) + "░" * (20 - int(battery_percent / 5))
-                print(f"\n🔋 배터리: {battery:.2f}V [{battery_bar}] {battery_percent:.1f}%")
-                
-                # 오도메트리
-                print(f"\n📍 오도메트리 (통합 속도 기반 추정):")
-                print(f"   위치 (x, y, θ): ({odom.x:6.3f} m, {odom.y:6.3f} m, {odom.theta:6.3f} rad)")
-                print(f"   속도 (vx, vy, vw): ({odom.vx:6.3f} m/s, {odom.vy:6.3f} m/s, {odom.vw:6.3f} rad/s)")
-
-                # IMU
-                print(f"\n🧭 IMU (단위: m/s², rad/s):")
-                print(f"   가속도 (x,y,z): ({imu.accel_x:6.3f}, {imu.accel_y:6.3f}, {imu.accel_z-GRAVITY:6.3f})")
-                print(f"   각속도 (x,y,z): ({imu.gyro_x:6.3f}, {imu.gyro_y:6.3f}, {imu.gyro_z:6.3f})")
+                # 한 프레임의 값은 모두 같은 스냅샷에서 읽음
+                velocity, odom, imu, battery = self.controller.get_telemetry_snapshot()
                 
-                # 현재 설정 속도
-                print(f"\n🎮 현재 제어 속도:")
-                print(f"   vx: {velocity.vx:.2f} m/s, vy: {velocity.vy:.2f} m/s, vw: {velocity.vw:.2f} rad/s")
-                
-                print("-" * 60)
-                print(f"⏰ 마지막 업데이트: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-                print("\n(Ctrl+C를 눌러 종료)")
+                # 시각 문자열은 초가 바뀔 때만 다시 만듦
+                now_sec = int(time.time())
+                if now_sec != stamp_sec:
+                    stamp_sec = now_sec
+                    # 날짜~분 부분은 분이 바뀔 때만 localtime/strftime으로 갱신
+                    sec = now_sec - minute_start
+                    if not 0 <= sec < 60:
+                        lt = time.localtime(now_sec)
+                        minute_start = now_sec - lt.tm_sec
+                        minute_prefix = time.strftime('%Y-%m-%d %H:%M:', lt)
+                        sec = lt.tm_sec
+                    stamp = f"{minute_prefix}{sec:02d}"
+
+                # 프레임 전체를 모아 한 번에 출력
+                body = self._render_frame(odom, imu, battery, velocity, stamp)
+                if fd is not None:
+                    _write_fd(fd, header_b + body.encode(encoding, 'replace') + footer_b)
+                else:
+                    with stdout_lock:
+                        sys.stdout.write(self._header + body + self._footer)
+                        sys.stdout.flush()
                 
-                time.sleep(0.1)  # 10Hz 업데이트
+                next_tick += self._period
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.monotonic()  # 밀린 주기는 따라잡지 않음
                 
             except Exception as e:
                 print(f"모니터링 오류: {e}")
                 time.sleep(1.0)
+                next_tick = time.monotonic()
+
+def _print_shared(telemetry: SharedTelemetry, period: float = 1.0):
+    """공유 메모리의 최신 값을 주기마다 한 줄로 출력 (--process 모드)"""
+    while telemetry.process.is_alive():
+        x, y, theta, vx, vy, vw, *_, battery, stamp = telemetry.read()
+        if stamp:  # 0이면 아직 첫 기록 전
+            print(f"📍 ({x:6.3f}, {y:6.3f}, {theta:6.3f}) "
+                  f"🚀 ({vx:5.2f}, {vy:5.2f}, {vw:5.2f}) 🔋 {battery:.2f}V")
+        time.sleep(period)
+    print("모니터 프로세스가 종료되었습니다.")
 
 def main():
     """메인 함수"""
-    port = sys.argv[1] if len(sys.argv) > 1 else '/dev/ttyUSB0'
+    parser = argparse.ArgumentParser(description="Xtark R20 센서 데이터 모니터링")
+    parser.add_argument('port', nargs='?', default='/dev/ttyUSB0', help="시리얼 포트")
+    parser.add_argument('--realtime', action='store_true',
+                        help="모니터 스레드를 SCHED_RR로 실행하고 메모리 잠금 (Linux, 권한 필요)")
+    cpu_group = parser.add_mutually_exclusive_group()
+    cpu_group.add_argument('--cpu', type=int, metavar='N',
+                           help="모니터 스레드를 고정할 CPU 번호 (Linux)")
+    cpu_group.add_argument('--last-cpu', dest='cpu', action='store_const',
+                           const=(os.cpu_count() or 1) - 1,
+                           help="모니터 스레드를 마지막 코어에 고정 (Linux)")
+    parser.add_argument('--process', action='store_true',
+                        help="별도 프로세스에서 센서를 읽고 공유 메모리로 받아 출력 (GIL 경합 없음)")
+    args = parser.parse_args()
+    port = args.port
     print(f"시리얼 포트: {port}")
     
     try:
+        if args.process:
+            # 자식 프로세스가 포트를 열고, 이 프로세스는 공유 메모리만 읽음
+            telemetry = SensorMonitor.spawn_process(port, RobotType.R20_MEC,
+                                                    realtime=args.realtime, cpu=args.cpu)
+            try:
+                _print_shared(telemetry)
+            finally:
+                telemetry.close()
+            return
+        
         # PDF 기반으로 R20_MEC(메카넘)을 기본값으로 설정
         with XtarkR20Controller(port, robot_type=RobotType.R20_MEC) as controller:
-            monitor = SensorMonitor(controller)
+            monitor = SensorMonitor(controller, realtime=args.realtime, cpu=args.cpu)
             monitor.start_monitoring()
-            while True:
-                time.sleep(1)
+            try:
+                while True:
+                    time.sleep(1)
+            finally:
+                monitor.stop_monitoring()
     except KeyboardInterrupt:
         print("\n\n프로그램 종료 중...")
     except ConnectionError as e:
         print(f"연결 오류: {e}")
         print("OpenCTR 컨트롤러가 올바르게 연결되었는지, 포트 이름이 맞는지 확인하세요.")
+    except RuntimeError as e:
+        print(f"오류: {e}")
     finally:
         print("프로그램 종료됨")
 
@@ -23,15 +23,47 @@ except ImportError:
     print("         'pip install keyboard'로 설치할 수 있습니다 (Windows/Linux에서 sudo 필요).")
 
 
+# 이동 키 -> (속도 축, speed_step 배율)
+_MOVE_KEYS = {
+    'w': ('vx', 1.0), 's': ('vx', -1.0),
+    'a': ('vw', 1.5), 'd': ('vw', -1.5),
+    'q': ('vy', 1.0), 'e': ('vy', -1.0),
+}
+
+
+def _scan_codes(name):
+    """키 이름에 해당하는 스캔 코드 (현재 자판 배치에 없으면 빈 튜플)"""
+    try:
+        return keyboard.key_to_scan_codes(name)
+    except ValueError:
+        return ()
+
+
 class KeyboardController:
     """키보드 제어 클래스"""
     
     def __init__(self, controller: XtarkR20Controller):
         self.controller = controller
         self.is_running = False
-        self.current_velocity = {'vx': 0.0, 'vy': 0.0, 'vw': 0.0}
+        self._vx = self._vy = self._vw = 0.0  # 목표 속도 (축별)
         self.speed_step = 0.3  # 기본 속도
         self.max_speed = 1.0   # 최대 속도
+        self._stop_evt = threading.Event()  # ESC 입력 시 설정
+        # 키 이벤트는 속도 값만 바꾸고, 전송은 별도 스레드가 최대 50Hz로 모아서 처리
+        self._vel_lock = threading.Lock()
+        self._vel_dirty = threading.Event()
+        self._tx_thread = None
+        self._scan_keys = {}  # 스캔 코드 -> 이동 (축, 배율) 또는 기능 메서드 (start()에서 생성)
+        self._name_keys = {}  # 스캔 코드를 얻지 못한 키만 이름으로 매칭
+        # 기능 키 -> 처리 메서드
+        self._actions = {
+            'space': self._stop,
+            'b': self._beep,
+            'l': self._led_test,
+            'i': self._calibrate_imu,
+            'p': self._print_status,
+            'esc': self._stop_control,
+        }
     
     def start(self):
         """키보드 제어 시작"""
@@ -48,51 +80,79 @@ class KeyboardController:
         print("  P: 상태 출력  ESC: 종료")
         
         self.is_running = True
+        self._stop_evt.clear()
+        self._tx_thread = threading.Thread(target=self._tx_loop, daemon=True)
+        self._tx_thread.start()
         
-        # ### 변경된 부분: 각 키를 직접 명시적으로 등록 ###
-        # Press 이벤트
-        keyboard.on_press_key('w', lambda e: self._update_velocity(vx=self.speed_step), suppress=True)
-        keyboard.on_press_key('s', lambda e: self._update_velocity(vx=-self.speed_step), suppress=True)
-        keyboard.on_press_key('d', lambda e: self._update_velocity(vw=-self.speed_step * 1.5), suppress=True)
-        keyboard.on_press_key('a', lambda e: self._update_velocity(vw=self.speed_step * 1.5), suppress=True)
-        keyboard.on_press_key('e', lambda e: self._update_velocity(vy=-self.speed_step), suppress=True)
-        keyboard.on_press_key('q', lambda e: self._update_velocity(vy=self.speed_step), suppress=True)
-        
-        # Release 이벤트
-        keyboard.on_release_key('w', lambda e: self._update_velocity(vx=0), suppress=True)
-        keyboard.on_release_key('s', lambda e: self._update_velocity(vx=0), suppress=True)
-        keyboard.on_release_key('d', lambda e: self._update_velocity(vw=0), suppress=True)
-        keyboard.on_release_key('a', lambda e: self._update_velocity(vw=0), suppress=True)
-        keyboard.on_release_key('e', lambda e: self._update_velocity(vy=0), suppress=True)
-        keyboard.on_release_key('q', lambda e: self._update_velocity(vy=0), suppress=True)
-
-        # 기능 키
-        keyboard.on_press_key('space', lambda e: self._stop(), suppress=True)
-        keyboard.on_press_key('b', lambda e: self._beep(), suppress=True)
-        keyboard.on_press_key('l', lambda e: self._led_test(), suppress=True)
-        keyboard.on_press_key('i', lambda e: self._calibrate_imu(), suppress=True)
-        keyboard.on_press_key('p', lambda e: self._print_status(), suppress=True)
-        keyboard.on_press_key('esc', lambda e: self._stop_control(), suppress=True)
+        # 모든 키 이벤트를 하나의 훅에서 스캔 코드 표로 분기
+        self._build_key_tables()
+        keyboard.hook(self._dispatch, suppress=True)
 
         print("\n로봇을 제어하세요...")
-        while self.is_running:
-            time.sleep(0.1)
+        # 종료 키가 눌리면 즉시 깨어남 (timeout은 Windows에서 Ctrl+C를 받기 위한 것)
+        while not self._stop_evt.wait(1.0):
+            pass
 
         keyboard.unhook_all()
+        self._tx_thread.join()
         self._stop()
         print("\n제어 종료.")
 
+    @property
+    def current_velocity(self) -> dict:
+        """현재 목표 속도 {'vx', 'vy', 'vw'}"""
+        return {'vx': self._vx, 'vy': self._vy, 'vw': self._vw}
+
+    def _build_key_tables(self):
+        """_MOVE_KEYS와 _actions를 스캔 코드 표로 변환
+
+        키 이름은 Shift/CapsLock/입력기(IME)에 따라 바뀌므로 ('w' -> 'W', 'ㅈ')
+        누를 때와 뗄 때 이름이 달라도 같은 물리 키로 인식하도록 스캔 코드로 비교합니다.
+        """
+        self._scan_keys.clear()
+        self._name_keys.clear()
+        for name, entry in list(_MOVE_KEYS.items()) + list(self._actions.items()):
+            codes = _scan_codes(name)
+            for code in codes:
+                self._scan_keys[code] = entry
+            if not codes:
+                self._name_keys[name] = entry
+
+    def _dispatch(self, event):
+        """키 이벤트 처리 (처리한 키는 False를 반환하여 다른 프로그램으로 전달하지 않음)"""
+        entry = self._scan_keys.get(event.scan_code)
+        if entry is None:
+            entry = self._name_keys.get(event.name)
+            if entry is None:
+                return True
+        pressed = event.event_type == keyboard.KEY_DOWN
+        if callable(entry):
+            if pressed:  # 기능 키는 누를 때만 실행
+                entry()
+            return False
+        # 이동 키: 누르면 해당 축 속도 설정, 떼면 그 축만 0으로
+        axis, scale = entry
+        self._update_velocity(**{axis: self.speed_step * scale if pressed else 0.0})
+        return False
+
     def _update_velocity(self, vx=None, vy=None, vw=None):
-        """속도 값을 업데이트하고 컨트롤러에 전송"""
-        if vx is not None: self.current_velocity['vx'] = vx
-        if vy is not None: self.current_velocity['vy'] = vy
-        if vw is not None: self.current_velocity['vw'] = vw
-        
-        self.controller.set_velocity(
-            self.current_velocity['vx'],
-            self.current_velocity['vy'],
-            self.current_velocity['vw']
-        )
+        """속도 값을 업데이트하고 전송 스레드에 알림"""
+        with self._vel_lock:
+            if vx is not None: self._vx = vx
+            if vy is not None: self._vy = vy
+            if vw is not None: self._vw = vw
+        self._vel_dirty.set()
+
+    def _tx_loop(self):
+        """속도 전송 루프 (변경이 있을 때만, 최대 50Hz)"""
+        while self.is_running:
+            if not self._vel_dirty.wait(0.1):
+                continue
+            self._vel_dirty.clear()
+            # 전송까지 잠금 유지: _stop의 정지 명령 뒤에 이전 속도가 나가지 않도록
+            with self._vel_lock:
+                self.controller.set_velocity(self._vx, self._vy, self._vw)
+            time.sleep(0.02)  # 그 사이의 키 입력은 다음 전송 한 번으로 합쳐짐
         
     def _manual_control(self):
         """수동 제어 모드 (keyboard 라이브러리 없이)"""
@@ -147,19 +207,20 @@ class KeyboardController:
         self._stop()
     
     def _stop(self):
-        """정지"""
-        self.current_velocity = {'vx': 0.0, 'vy': 0.0, 'vw': 0.0}
-        self.controller.set_velocity(0.0, 0.0, 0.0)
+        """정지 (전송 스레드를 거치지 않고 즉시 전송)"""
+        with self._vel_lock:
+            self._vx = self._vy = self._vw = 0.0
+            self.controller.set_velocity(0.0, 0.0, 0.0)
         print("긴급 정지!")
     
     def _stop_control(self):
         """제어 종료"""
         self.is_running = False
+        self._stop_evt.set()
 
     def _beep(self):
         """부저 테스트"""
-        self.controller.set_beeper(True)
-        threading.Timer(0.3, lambda: self.controller.set_beeper(False)).start()
+        self.controller.beep(0.3)
         print("부저 ON/OFF")
     
     def _led_test(self):
@@ -188,10 +249,7 @@ class KeyboardController:
     
     def _print_status(self):
         """상태 출력"""
-        vel = self.controller.get_current_velocity()
-        odom = self.controller.get_odometry()
-        imu = self.controller.get_imu_data()
-        battery = self.controller.get_battery_voltage()
+        vel, odom, imu, battery = self.controller.get_telemetry_snapshot()
         
         print(f"\n=== 로봇 상태 ===")
         print(f"제어 속도: vx={vel.vx:.2f}, vy={vel.vy:.2f}, vw={vel.vw:.2f}")
@@ -7,9 +7,32 @@
     python port_scanner.py
 """
 
+import re
 import sys
 import time
+import select
 import platform
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+# 실행 중에는 바뀌지 않으므로 한 번만 조회
+_SYSTEM = platform.system()
+_IS_WIN = _SYSTEM == "Windows"
+_IS_MAC = _SYSTEM == "Darwin"
+
+# OpenCTR 응답 확인용 테스트 패킷 (로봇 타입 설정): 헤더 + 명령 + 데이터 + 체크섬
+_PROBE_PACKET = bytes((0xAA, 0x55, 0x5A, 0x01, 0x01, 0x00))
+# OpenCTR 수신 패킷 헤더
+_RESPONSE_HEADER = bytes((0xAA, 0x55))
+# (보드레이트 목록, 응답 대기 시간): 대부분의 보드는 앞의 두 속도 중 하나를 사용
+_BAUD_STAGES = (
+    ((230400, 115200), 0.1),
+    ((57600, 38400, 19200, 9600), 0.5),
+)
+# 응답 덤프용 바이트 -> "0A" 형식 문자열 표
+_HEX = tuple(f'{b:02X}' for b in range(256))
+# 장치 설명에 이 키워드가 있으면 OpenCTR(USB-시리얼 변환기)일 가능성이 높음
+_OPENCTR_RE = re.compile(r'USB|Serial|UART|CH340|CP210|FTDI|Arduino', re.I)
 
 def find_serial_ports():
     """사용 가능한 시리얼 포트 찾기"""
@@ -34,10 +57,7 @@ def find_serial_ports():
             print(f"   시리얼번호: {port.serial_number or 'Unknown'}")
             
             # OpenCTR 관련 키워드 확인
-            keywords = ['USB', 'Serial', 'UART', 'CH340', 'CP210', 'FTDI', 'Arduino']
-            is_likely_openctr = any(keyword.lower() in (port.description or '').lower() for keyword in keywords)
-            
-            if is_likely_openctr:
+            if _OPENCTR_RE.search(port.description or ''):
                 print("   🎯 OpenCTR일 가능성이 높습니다!")
             
             print("-" * 60)
@@ -53,78 +73,124 @@ def find_serial_ports():
         print(f"❌ 포트 스캔 오류: {e}")
         return []
 
+def _probe_port(port):
+    """포트를 잠깐 열어 보고 사용 가능하면 포트 이름, 아니면 None 반환"""
+    import serial
+    try:
+        with serial.Serial(port, timeout=0.1):
+            return port
+    except (serial.SerialException, OSError):
+        return None  # 포트가 없거나 사용 중
+
+@lru_cache(maxsize=None)
+def _candidate_ports():
+    """플랫폼별 일반적인 포트 목록 (처음 한 번만 /dev 검색)"""
+    if _IS_WIN:
+        return tuple(f"COM{i}" for i in range(1, 21))  # COM1-COM20
+    import glob
+    if _IS_MAC:
+        return tuple(glob.glob('/dev/tty.usb*') + glob.glob('/dev/cu.usb*') + ['/dev/ttyUSB0', '/dev/ttyACM0'])
+    # Linux
+    return tuple(glob.glob('/dev/ttyUSB*') + glob.glob('/dev/ttyACM*') + glob.glob('/dev/ttyS*'))
+
 def manual_port_check():
     """수동으로 일반적인 포트들 확인"""
     print("\n🔍 수동 포트 확인:")
     print("=" * 60)
     
-    # 플랫폼별 일반적인 포트들
-    if platform.system() == "Windows":
-        test_ports = [f"COM{i}" for i in range(1, 21)]  # COM1-COM20
-    elif platform.system() == "Darwin":  # macOS
-        import glob
-        test_ports = glob.glob('/dev/tty.usb*') + glob.glob('/dev/cu.usb*') + ['/dev/ttyUSB0', '/dev/ttyACM0']
-    else:  # Linux
-        import glob
-        test_ports = glob.glob('/dev/ttyUSB*') + glob.glob('/dev/ttyACM*') + glob.glob('/dev/ttyS*')
-    
-    available_ports = []
+    try:
+        import serial  # 설치 여부만 확인
+    except ImportError:
+        print("❌ pyserial이 설치되지 않았습니다.")
+        return []
+
+    # 일반적인 포트 이름을 직접 열어 확인
+    # 포트별 열기 시도는 서로 독립적이므로 동시에 진행 (결과는 후보 순서 유지)
+    with ThreadPoolExecutor(max_workers=16) as ex:
+        results = list(ex.map(_probe_port, _candidate_ports()))
     
-    for port in test_ports:
-        try:
-            import serial
-            with serial.Serial(port, timeout=0.1) as ser:
-                available_ports.append(port)
-                print(f"✅ {port} - 사용 가능")
-        except (serial.SerialException, FileNotFoundError, PermissionError):
-            pass  # 포트가 없거나 사용 중
-        except ImportError:
-            print("❌ pyserial이 설치되지 않았습니다.")
-            break
+    available_ports = [port for port in results if port]
+    for port in available_ports:
+        print(f"✅ {port} - 사용 가능")
     
     if not available_ports:
         print("❌ 사용 가능한 포트를 찾을 수 없습니다.")
     
     return available_ports
 
+def _wait_readable(ser, timeout):
+    """수신 데이터가 생길 때까지 최대 timeout초 대기 (도착하면 True)"""
+    try:
+        fd = ser.fileno()
+    except (AttributeError, OSError):  # Windows: select에 넘길 파일 디스크립터 없음
+        deadline = time.monotonic() + timeout
+        while not ser.in_waiting and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return ser.in_waiting > 0
+    ready, _, _ = select.select([fd], [], [], timeout)
+    return bool(ready)
+
+def _read_probe_response(ser, timeout):
+    """응답을 모으다가 OpenCTR 헤더가 보이면 즉시 반환 (없으면 timeout까지 받은 만큼)"""
+    deadline = time.monotonic() + timeout
+    buf = bytearray()
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not _wait_readable(ser, remaining):
+            break
+        buf += ser.read(ser.in_waiting or 1)
+        if _RESPONSE_HEADER in buf:
+            break
+    return bytes(buf)
+
 def test_port_connection(port):
     """특정 포트에서 OpenCTR 통신 테스트"""
     print(f"\n🧪 {port} 포트 테스트 중...")
     print("-" * 40)
     
+    ser = None
     try:
         import serial
         
-        # 다양한 보드레이트로 테스트
-        baudrates = [230400, 115200, 57600, 38400, 19200, 9600]
+        ser = serial.Serial(port, timeout=0)
         
-        for baudrate in baudrates:
-            try:
-                print(f"   보드레이트 {baudrate} 테스트...", end="")
-                
-                with serial.Serial(port, baudrate, timeout=1.0) as ser:
-                    time.sleep(0.1)  # 연결 안정화
+        # 흔한 보드레이트부터 짧게 시도하고, OpenCTR 헤더가 보이면 즉시 종료
+        # 헤더 없는 응답(잘못된 속도에서 깨진 데이터일 수 있음)은 다른 후보가 없을 때만 사용
+        fallback = None
+        for baudrates, timeout in _BAUD_STAGES:
+            for baudrate in baudrates:
+                try:
+                    print(f"   보드레이트 {baudrate} 테스트...", end="")
                     
-                    # 간단한 테스트 패킷 전송 (로봇 타입 설정)
-                    test_packet = bytes([0xAA, 0x55, 0x5A, 0x01, 0x01, 0x00])  # 헤더 + 명령 + 데이터 + 체크섬
-                    ser.write(test_packet)
+                    # 포트를 다시 열지 않고 보드레이트만 변경
+                    ser.baudrate = baudrate
+                    ser.reset_input_buffer()
+                    time.sleep(0.02)  # 연결 안정화
                     
-                    # 응답 대기
-                    response = ser.read(20)
+                    ser.write(_PROBE_PACKET)
+                    response = _read_probe_response(ser, timeout)
                     
-                    if len(response) > 0:
+                    if _RESPONSE_HEADER in response:
                         print(f" ✅ 응답 있음 ({len(response)} bytes)")
-                        print(f"      응답 데이터: {' '.join([f'{b:02X}' for b in response])}")
+                        print(f"      응답 데이터: {' '.join([_HEX[b] for b in response])}")
                         return baudrate
+                    elif response:
+                        print(f" ⚠️  헤더 없는 응답 ({len(response)} bytes)")
+                        if fallback is None:
+                            fallback = baudrate
                     else:
                         print(" ❌ 응답 없음")
                         
-            except serial.SerialException as e:
-                print(f" ❌ 오류: {e}")
-                continue
-            except Exception as e:
-                print(f" ❌ 예외: {e}")
-                continue
+                except serial.SerialException as e:
+                    print(f" ❌ 오류: {e}")
+                    continue
+                except Exception as e:
+                    print(f" ❌ 예외: {e}")
+                    continue
+        
+        if fallback is not None:
+            print(f"   OpenCTR 헤더는 없지만 {fallback}에서 응답이 있었습니다.")
+            return fallback
         
         print(f"   {port}에서 OpenCTR 응답을 받지 못했습니다.")
         return None
@@ -135,10 +201,13 @@ def test_port_connection(port):
     except Exception as e:
         print(f"❌ 테스트 오류: {e}")
         return None
+    finally:
+        if ser is not None:
+            ser.close()
 
 def check_permissions(port):
     """포트 권한 확인 (Linux/macOS)"""
-    if platform.system() in ["Linux", "Darwin"]:
+    if _SYSTEM in ("Linux", "Darwin"):
         import os
         import stat
         
@@ -174,7 +243,7 @@ def system_info():
     """시스템 정보 출력"""
     print("💻 시스템 정보:")
     print("=" * 60)
-    print(f"운영체제: {platform.system()} {platform.release()}")
+    print(f"운영체제: {_SYSTEM} {platform.release()}")
     print(f"Python 버전: {sys.version}")
     print(f"아키텍처: {platform.machine()}")
     
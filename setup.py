@@ -11,6 +11,8 @@ import sys
 import subprocess
 import platform
 import os
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 
 def check_python_version():
     """Python 버전 확인"""
@@ -25,24 +27,70 @@ def check_python_version():
         print(f"✅ Python {version.major}.{version.minor}.{version.micro} 사용 중")
         return True
 
-def install_package(package_name, import_name=None):
-    """패키지 설치"""
-    if import_name is None:
-        import_name = package_name
+def _is_installed(import_name):
+    """모듈 설치 여부 (실제로 import하지 않고 검색 경로에서만 확인)"""
+    return importlib.util.find_spec(import_name) is not None
+
+def install_packages(packages):
+    """누락된 패키지만 모아 pip 한 번으로 설치
+
+    Args:
+        packages: (패키지 이름, import 이름) 목록
+
+    Returns:
+        모두 설치되어 있거나 설치에 성공하면 True
+    """
+    missing = [package for package, import_name in packages if not _is_installed(import_name)]
+    installed = [package for package, _ in packages if package not in missing]
+    if installed:
+        print(f"✅ 이미 설치됨: {', '.join(installed)}")
+    if not missing:
+        return True
     
+    print(f"📦 설치 중: {', '.join(missing)}")
     try:
-        __import__(import_name)
-        print(f"✅ {package_name} 이미 설치됨")
+        subprocess.check_call([sys.executable, "-m", "pip", "install", *missing])
+    except subprocess.CalledProcessError:
+        print(f"❌ 설치 실패: {', '.join(missing)}")
+        return False
+    print(f"✅ 설치 완료: {', '.join(missing)}")
+    return True
+
+def _pip_install_captured(packages):
+    """pip install을 출력 캡처 모드로 실행 (성공 여부, 출력)"""
+    result = subprocess.run([sys.executable, "-m", "pip", "install", *packages],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            universal_newlines=True)
+    return result.returncode == 0, result.stdout
+
+def start_background_install(packages):
+    """누락된 패키지 설치를 백그라운드에서 시작 (다른 설정 단계와 동시 진행)
+
+    pip 출력은 화면이 섞이지 않도록 모아 두고, pip 프로세스는 한 번에 하나만 실행합니다.
+
+    Returns:
+        (설치할 패키지 목록, (성공 여부, 출력)을 돌려주는 Future 또는 None)
+    """
+    missing = [package for package, import_name in packages if not _is_installed(import_name)]
+    if not missing:
+        return missing, None
+    print(f"📦 백그라운드에서 설치 중: {', '.join(missing)}")
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(_pip_install_captured, missing)
+    executor.shutdown(wait=False)
+    return missing, future
+
+def finish_background_install(missing, future):
+    """백그라운드 설치 완료를 기다리고 결과 출력 (성공 또는 설치할 것이 없으면 True)"""
+    if future is None:
         return True
-    except ImportError:
-        print(f"📦 {package_name} 설치 중...")
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package_name])
-            print(f"✅ {package_name} 설치 완료")
-            return True
-        except subprocess.CalledProcessError:
-            print(f"❌ {package_name} 설치 실패")
-            return False
+    ok, output = future.result()
+    if ok:
+        print(f"✅ 설치 완료: {', '.join(missing)}")
+    else:
+        print(f"❌ 설치 실패: {', '.join(missing)}")
+        print(output.strip())
+    return ok
 
 def check_serial_ports():
     """사용 가능한 시리얼 포트 확인"""
@@ -235,18 +283,19 @@ def main():
     ]
     
     # 필수 패키지
-    all_success = True
-    for package, import_name in required_packages:
-        if not install_package(package, import_name):
-            all_success = False
+    all_success = install_packages(required_packages)
     
-    # 선택적 패키지
+    # 선택적 패키지 (아래 포트 확인/설정 파일 생성과 동시에 진행)
     print("\n📦 선택적 패키지 설치 중...")
-    for package, import_name in optional_packages:
-        if not install_package(package, import_name):
-            print(f"⚠️  {package}는 선택사항입니다. 키보드 제어 기능이 제한될 수 있습니다.")
+    optional_missing, optional_future = start_background_install(optional_packages)
+    
+    def finish_optional():
+        if not finish_background_install(optional_missing, optional_future):
+            print(f"⚠️  {', '.join(optional_missing)}는 선택사항입니다. "
+                  "키보드 제어 기능이 제한될 수 있습니다.")
     
     if not all_success:
+        finish_optional()
         print("\n❌ 일부 필수 패키지 설치에 실패했습니다.")
         print("수동으로 설치해주세요: pip install pyserial")
         return
@@ -258,6 +307,9 @@ def main():
     print("\n⚙️  설정 파일 생성 중...")
     create_example_config()
     
+    # 선택적 패키지 설치 결과 (바로가기 생성 입력 전에 정리)
+    finish_optional()
+    
     # 바로가기 생성 (선택적)
     create_desktop_shortcuts()
     
@@ -9,18 +9,38 @@ pyserial이 없어도 기본적인 포트 확인이 가능합니다.
 
 import os
 import platform
-import glob
 import sys
 
+# 실행 중에는 바뀌지 않으므로 한 번만 조회
+SYSTEM = platform.system()
+
+_dev_names = None
+
+def _dev_ports(*prefixes):
+    """/dev 목록을 한 번만 읽어 이름 접두사별로 분류 (앞쪽 접두사가 우선)"""
+    global _dev_names
+    if _dev_names is None:
+        try:
+            with os.scandir('/dev') as it:
+                _dev_names = sorted(entry.name for entry in it)
+        except OSError:  # /dev가 없거나 읽을 권한이 없음 (컨테이너 등)
+            _dev_names = []
+    buckets = {prefix: [] for prefix in prefixes}
+    for name in _dev_names:
+        for prefix in prefixes:
+            if name.startswith(prefix):
+                buckets[prefix].append('/dev/' + name)
+                break
+    return buckets
+
 def check_basic_ports():
     """기본적인 포트 존재 여부 확인"""
     print("🔍 기본 포트 확인 (pyserial 불필요)")
     print("=" * 50)
     
-    system = platform.system()
     found_ports = []
     
-    if system == "Windows":
+    if SYSTEM == "Windows":
         print("Windows 시스템에서는 장치 관리자를 확인하세요:")
         print("1. Win + X 키를 누르고 '장치 관리자' 선택")
         print("2. '포트(COM & LPT)' 섹션 확인")
@@ -32,11 +52,14 @@ def check_basic_ports():
             port = f"COM{i}"
             print(f"   테스트할 포트: {port}")
         
-    elif system == "Darwin":  # macOS
+    elif SYSTEM == "Darwin":  # macOS
         print("macOS 포트 확인:")
         
+        # /dev를 한 번만 읽고 USB 장치와 나머지로 분류
+        dev = _dev_ports('tty.usb', 'cu.usb', 'tty.', 'cu.')
+        
         # USB 시리얼 장치
-        usb_ports = glob.glob('/dev/tty.usb*') + glob.glob('/dev/cu.usb*')
+        usb_ports = dev['tty.usb'] + dev['cu.usb']
         
         if usb_ports:
             print("✅ USB 시리얼 포트 발견:")
@@ -47,7 +70,7 @@ def check_basic_ports():
             print("❌ USB 시리얼 포트를 찾을 수 없습니다.")
         
         # 기타 시리얼 포트
-        other_ports = glob.glob('/dev/tty.*') + glob.glob('/dev/cu.*')
+        other_ports = dev['tty.usb'] + dev['tty.'] + dev['cu.usb'] + dev['cu.']
         if other_ports:
             print(f"\n📋 기타 시리얼 포트 ({len(other_ports)}개):")
             for port in other_ports[:10]:  # 처음 10개만 표시
@@ -55,9 +78,10 @@ def check_basic_ports():
         
     else:  # Linux
         print("Linux 포트 확인:")
+        dev = _dev_ports('ttyUSB', 'ttyACM', 'ttyS')
         
         # USB 포트
-        usb_ports = glob.glob('/dev/ttyUSB*')
+        usb_ports = dev['ttyUSB']
         if usb_ports:
             print("✅ USB 포트 발견:")
             for port in usb_ports:
@@ -67,7 +91,7 @@ def check_basic_ports():
             print("❌ USB 포트(/dev/ttyUSB*)를 찾을 수 없습니다.")
         
         # ACM 포트 (Arduino 등)
-        acm_ports = glob.glob('/dev/ttyACM*')
+        acm_ports = dev['ttyACM']
         if acm_ports:
             print("✅ ACM 포트 발견:")
             for port in acm_ports:
@@ -77,7 +101,7 @@ def check_basic_ports():
             print("❌ ACM 포트(/dev/ttyACM*)를 찾을 수 없습니다.")
         
         # 기본 시리얼 포트
-        serial_ports = glob.glob('/dev/ttyS*')
+        serial_ports = dev['ttyS']
         if serial_ports:
             print(f"📋 기본 시리얼 포트 ({len(serial_ports)}개):")
             for port in serial_ports[:5]:  # 처음 5개만 표시
@@ -87,7 +111,7 @@ def check_basic_ports():
 
 def check_port_permissions(ports):
     """포트 권한 확인 (Linux/macOS)"""
-    if platform.system() in ["Linux", "Darwin"] and ports:
+    if SYSTEM in ["Linux", "Darwin"] and ports:
         print(f"\n🔐 포트 권한 확인:")
         print("-" * 30)
         
@@ -106,9 +130,7 @@ def check_port_permissions(ports):
 
 def check_usb_devices():
     """USB 장치 확인 (Linux/macOS)"""
-    system = platform.system()
-    
-    if system == "Darwin":  # macOS
+    if SYSTEM == "Darwin":  # macOS
         print(f"\n💻 macOS USB 장치 확인:")
         print("-" * 30)
         
@@ -143,7 +165,7 @@ def check_usb_devices():
         except Exception as e:
             print(f"USB 장치 확인 오류: {e}")
     
-    elif system == "Linux":
+    elif SYSTEM == "Linux":
         print(f"\n💻 Linux USB 장치 확인:")
         print("-" * 30)
         
@@ -165,20 +187,17 @@ def check_usb_devices():
 
 def check_dmesg_logs():
     """시스템 로그에서 USB 연결 확인 (Linux/macOS)"""
-    system = platform.system()
-    
-    if system == "Linux":
+    if SYSTEM == "Linux":
         print(f"\n📋 최근 USB 연결 로그 (dmesg):")
         print("-" * 40)
         
         try:
             import subprocess
-            # 최근 USB 관련 로그만 확인
-            result = subprocess.run(['dmesg', '|', 'grep', '-i', 'usb', '|', 'tail', '-10'], 
-                                  shell=True, capture_output=True, text=True, timeout=5)
+            # dmesg만 실행하고 USB 관련 최근 10줄은 직접 골라냄 (grep/tail 프로세스 불필요)
+            result = subprocess.run(['dmesg'], capture_output=True, text=True, timeout=5)
+            lines = [line for line in result.stdout.splitlines() if 'usb' in line.lower()][-10:]
             
-            if result.returncode == 0 and result.stdout.strip():
-                lines = result.stdout.strip().split('\n')
+            if result.returncode == 0 and lines:
                 for line in lines:
                     print(f"   {line}")
             else:
@@ -192,9 +211,7 @@ def manual_test_suggestions():
     print(f"\n🛠️  수동 확인 방법:")
     print("=" * 50)
     
-    system = platform.system()
-    
-    if system == "Windows":
+    if SYSTEM == "Windows":
         print("Windows:")
         print("1. 장치 관리자 열기 (Win + X → 장치 관리자)")
         print("2. '포트(COM & LPT)' 확장")
@@ -202,7 +219,7 @@ def manual_test_suggestions():
         print("4. COM 포트 번호 기록")
         print("5. 드라이버 상태 확인")
         
-    elif system == "Darwin":  # macOS
+    elif SYSTEM == "Darwin":  # macOS
         print("macOS:")
         print("1. 터미널에서 다음 명령 실행:")
         print("   ls /dev/tty.* | grep -i usb")
@@ -229,7 +246,7 @@ def main():
     print("🔍 Xtark R20 포트 확인 유틸리티 (Simple)")
     print("=" * 60)
     
-    print(f"💻 시스템: {platform.system()} {platform.release()}")
+    print(f"💻 시스템: {SYSTEM} {platform.release()}")
     print(f"🐍 Python: {sys.version.split()[0]}")
     print()
     
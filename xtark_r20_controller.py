@@ -10,14 +10,18 @@ Date: 2025-07-14
 """
 
 import serial
+import sys
 import time
 import struct
 import threading
+import queue
 from enum import Enum
 from dataclasses import dataclass
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, NamedTuple
 import logging
 import math
+from collections import deque
+from contextlib import contextmanager
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -26,6 +30,13 @@ logger = logging.getLogger(__name__)
 # 물리 상수
 GRAVITY = 9.80665
 
+# 데이터 구조체는 인스턴스 __dict__ 없이 슬롯 사용 (dataclass slots 옵션은 Python 3.10+)
+_DATACLASS_KW = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# 수신 스레드에서 매 패킷 호출하는 함수 (전역 조회 + 속성 조회를 한 번으로)
+_sin = math.sin
+_cos = math.cos
+
 class RobotType(Enum):
     """로봇 타입 정의 (PDF 페이지 43, 61 참조) [cite: 1568, 2464, 2465, 2466]"""
     R20_MEC = 0x01   # 메카넘 휠
@@ -35,14 +46,14 @@ class RobotType(Enum):
     R20_TNK = 0x05   # 탱크 타입
     R20_OMT = 0x06   # 옴니 휠
 
-@dataclass
+@dataclass(**_DATACLASS_KW)
 class Velocity:
     """속도 데이터 구조체"""
     vx: float = 0.0  # X축 속도 (전후진, m/s)
     vy: float = 0.0  # Y축 속도 (좌우이동, m/s)
     vw: float = 0.0  # 각속도 (회전, rad/s)
 
-@dataclass
+@dataclass(**_DATACLASS_KW)
 class IMUData:
     """IMU 센서 데이터 구조체"""
     accel_x: float = 0.0
@@ -52,7 +63,7 @@ class IMUData:
     gyro_y: float = 0.0
     gyro_z: float = 0.0
 
-@dataclass
+@dataclass(**_DATACLASS_KW)
 class OdometryData:
     """오도메트리 데이터 구조체"""
     x: float = 0.0      # 전역 X 위치 (m)
@@ -62,12 +73,32 @@ class OdometryData:
     vy: float = 0.0     # 로봇 기준 Y축 속도 (m/s)
     vw: float = 0.0     # 로봇 기준 각속도 (rad/s)
 
+def _integrate_pose(x: float, y: float, theta: float,
+                    vx: float, vy: float, vw: float, dt: float) -> Tuple[float, float, float]:
+    """로봇 기준 속도를 dt만큼 적분하여 새 전역 자세 (x, y, theta) 반환"""
+    c = _cos(theta)
+    s = _sin(theta)
+    return x + (vx * c - vy * s) * dt, y + (vx * s + vy * c) * dt, theta + vw * dt
+
+class TelemetrySnapshot(NamedTuple):
+    """한 시점에 함께 읽은 텔레메트리 묶음"""
+    vel: Velocity
+    odom: OdometryData
+    imu: IMUData
+    battery: float
+
 class XtarkR20Controller:
     """Xtark R20 로봇 컨트롤러 클래스"""
 
+    __slots__ = ('port', 'baudrate', 'robot_type', 'serial_conn', 'is_connected', 'is_running',
+                 '_telemetry', '_cmd_vel', 'last_update_ns', 'receive_thread', '_rx_ready',
+                 '_beep_q', '_beep_thread',
+                 'tx_lock', '_tx_queue', '_tx_batch', '_tx_buf', '_vel_pkt', '_rgb_pkt')
+
     # 프로토콜 상수 (PDF 페이지 41 참조) 
     HEADER1 = 0xAA
     HEADER2 = 0x55
+    _HEADER_SIG = bytes((HEADER1, HEADER2))  # 수신 패킷 탐색용
 
     # 명령 ID (PDF 페이지 41 참조) 
     CMD_VELOCITY = 0x50      # 속도 제어
@@ -80,6 +111,22 @@ class XtarkR20Controller:
     # 수신 데이터 ID (PDF 페이지 41 참조) 
     ID_INTEGRATED_DATA = 0x10 # 통합 데이터 (IMU, Odometry, Battery)
 
+    RX_BUF_SIZE = 4096  # 수신 버퍼 크기 (바이트)
+    RX_SPIN_TIME = 2e-4 # 패킷 수신 후 블로킹 없이 다음 데이터를 확인하는 시간 (초)
+
+    # 미리 컴파일한 패킷 포맷
+    _HDR = struct.Struct('<BBBB')                # 헤더1, 헤더2, 길이, 명령 ID
+    _VEL = struct.Struct('<hhh')                 # vx, vy, vw (x1000)
+    _RGB = struct.Struct('<BBBBBB')              # 모드, 0, 0, R, G, B
+    _INTEGRATED = struct.Struct('<hhhhhhhhhH')   # 가속도 3, 자이로 3, 속도 3, 전압
+    _BYTE = struct.Struct('B')
+
+    # 원시값 -> 물리량 배율 (±2g 가속도, ±500°/s 자이로, mm/s, 10mV)
+    _ACC_SCALE = 2.0 * GRAVITY / 32768.0
+    _GYRO_SCALE = 500.0 * math.pi / 180.0 / 32768.0
+    _VEL_SCALE = 1e-3
+    _VOLT_SCALE = 1e-2
+
     def __init__(self, port: str = '/dev/ttyUSB0', baudrate: int = 230400,
                  robot_type: RobotType = RobotType.R20_MEC):
         """
@@ -92,16 +139,25 @@ class XtarkR20Controller:
         self.is_connected = False
         self.is_running = False
 
-        # 데이터 저장소
-        self.current_velocity = Velocity()
-        self.odometry_data = OdometryData()
-        self.imu_data = IMUData()
-        self.battery_voltage = 0.0
-        self.last_update_time = time.time()
+        # 데이터 저장소: 갱신할 때마다 새 객체로 통째로 교체 (참조 대입은 원자적이므로 잠금 불필요)
+        # _telemetry는 수신 스레드만, _cmd_vel은 set_velocity만 교체
+        self._cmd_vel = Velocity()
+        self._telemetry = TelemetrySnapshot(self._cmd_vel, OdometryData(), IMUData(), 0.0)
+        self.last_update_ns = time.monotonic_ns()  # 마지막 수신 시각 (시스템 시계 변경에 영향 없음)
 
         # 스레드 관리
         self.receive_thread: Optional[threading.Thread] = None
-        self.data_lock = threading.Lock()
+        self._rx_ready = threading.Event()  # 수신 스레드가 루프에 들어가면 설정
+        self._beep_q = queue.SimpleQueue()  # beep() 요청 (울릴 시간, 초)
+        self._beep_thread: Optional[threading.Thread] = None
+
+        # 재사용 송신 버퍼 (헤더/길이/명령 ID는 고정, 데이터와 체크섬만 갱신)
+        self.tx_lock = threading.RLock()
+        self._tx_queue = deque()  # batched() 안에서 모아 둔 송신 패킷
+        self._tx_batch = 1        # 이 개수만큼 모이면 전송 (1 = 즉시 전송)
+        self._tx_buf = bytearray(64)  # _send_packet이 제자리에서 채우는 송신 버퍼
+        self._vel_pkt = bytearray(self._build_packet(self.CMD_VELOCITY, bytes(6)))
+        self._rgb_pkt = bytearray(self._build_packet(self.CMD_RGB_LIGHT, bytes(6)))
 
         logger.info(f"Xtark R20 컨트롤러 초기화 완료")
         logger.info(f"포트: {port}, 보드레이트: {baudrate}, 로봇 타입: {robot_type.name}")
@@ -112,12 +168,14 @@ class XtarkR20Controller:
             self.serial_conn = serial.Serial(
                 port=self.port,
                 baudrate=self.baudrate,
-                timeout=1.0
+                timeout=0.05  # 수신 스레드가 is_running을 확인하는 주기
             )
             if self.serial_conn.is_open:
                 self.is_connected = True
                 self._start_receive_thread()
-                time.sleep(0.1) # 스레드 시작 대기
+                self._rx_ready.wait(timeout=1.0) # 스레드 시작 대기
+                self._beep_thread = threading.Thread(target=self._beeper_loop, daemon=True)
+                self._beep_thread.start()
                 self._set_robot_type(self.robot_type)
                 logger.info("OpenCTR 연결 성공!")
                 return True
@@ -132,8 +190,16 @@ class XtarkR20Controller:
         """연결 해제"""
         if self.is_connected:
             self.set_velocity(0.0, 0.0, 0.0)
-            time.sleep(0.1)
+            self.flush_tx()
+            try:
+                self.serial_conn.flush()  # 정지 명령이 실제로 송신될 때까지 대기
+            except serial.SerialException as e:
+                logger.error(f"데이터 전송 실패: {e}")
             self.is_running = False
+            if self._beep_thread:
+                self._beep_q.put(None)
+                self._beep_thread.join(timeout=1.0)
+                self._beep_thread = None
             if self.receive_thread and self.receive_thread.is_alive():
                 self.receive_thread.join(timeout=1.0)
             if self.serial_conn:
@@ -143,7 +209,7 @@ class XtarkR20Controller:
 
     def _set_robot_type(self, robot_type: RobotType):
         """로봇 타입 설정 (PDF 페이지 43) [cite: 1566]"""
-        data = struct.pack('B', robot_type.value)
+        data = self._BYTE.pack(robot_type.value)
         self._send_packet(self.CMD_ROBOT_TYPE, data)
         logger.info(f"로봇 타입 설정: {robot_type.name}")
 
@@ -153,29 +219,64 @@ class XtarkR20Controller:
         vx_int = int(vx * 1000)
         vy_int = int(vy * 1000)
         vw_int = int(vw * 1000)
-        data = struct.pack('<hhh', vx_int, vy_int, vw_int)
-        self._send_packet(self.CMD_VELOCITY, data)
-        with self.data_lock:
-            self.current_velocity = Velocity(vx, vy, vw)
+        with self.tx_lock:
+            # 가장 자주 보내는 명령이므로 미리 만든 패킷의 데이터와 체크섬만 갱신
+            pkt = self._vel_pkt
+            self._VEL.pack_into(pkt, 4, vx_int, vy_int, vw_int)
+            pkt[10] = sum(memoryview(pkt)[:10]) & 0xFF
+            self.write_packet(pkt)
+        self._cmd_vel = Velocity(vx, vy, vw)
+
+    def stop_and_settle(self, t: float):
+        """정지 명령 후 t초 대기"""
+        self.set_velocity(0.0, 0.0, 0.0)
+        time.sleep(t)
 
     def set_beeper(self, enable: bool):
         """부저 제어 (PDF 페이지 43) [cite: 1562]"""
         if not self.is_connected: return
-        data = struct.pack('B', 1 if enable else 0)
+        data = self._BYTE.pack(1 if enable else 0)
         self._send_packet(self.CMD_BEEPER, data)
 
+    def beep(self, duration: float = 0.1):
+        """부저를 duration초 울림 (전용 작업 스레드가 순서대로 처리하므로 바로 반환)"""
+        if not self.is_connected: return
+        self._beep_q.put(duration)
+
+    def _beeper_loop(self):
+        """부저 요청을 순서대로 처리하는 작업 스레드 (None이면 종료)"""
+        while True:
+            duration = self._beep_q.get()
+            if duration is None:
+                break
+            self.set_beeper(True)
+            time.sleep(duration)
+            self.set_beeper(False)
+
     def set_rgb_light(self, r: int, g: int, b: int, mode: int = 1):
         """RGB LED 제어 (PDF 페이지 43) [cite: 1557]"""
         if not self.is_connected: return
+        r, g, b = max(0, min(255, r)), max(0, min(255, g)), max(0, min(255, b))
+        with self.tx_lock:
+            # 미리 만든 패킷의 데이터(6바이트)와 체크섬만 제자리에서 갱신
+            pkt = self._rgb_pkt
+            self._RGB.pack_into(pkt, 4, mode, 0, 0, r, g, b)
+            pkt[10] = sum(memoryview(pkt)[:10]) & 0xFF
+            self.write_packet(pkt)
+
+    def rgb_light_packet(self, r: int, g: int, b: int, mode: int = 1) -> bytes:
+        """set_rgb_light와 같은 RGB LED 명령 패킷을 미리 생성 (write_packet으로 전송)"""
+        return self._build_packet(self.CMD_RGB_LIGHT, self._rgb_light_data(r, g, b, mode))
+
+    def _rgb_light_data(self, r: int, g: int, b: int, mode: int) -> bytes:
         r, g, b = max(0, min(255, r)), max(0, min(255, g)), max(0, min(255, b))
         # PDF에 따르면 주모드, 종속모드, 시간, R, G, B 순서. 종속모드와 시간은 현재 미사용.
-        data = struct.pack('<BBBBBB', mode, 0, 0, r, g, b)
-        self._send_packet(self.CMD_RGB_LIGHT, data)
+        return self._RGB.pack(mode, 0, 0, r, g, b)
 
     def save_light_setting(self):
         """현재 조명 효과를 EEPROM에 저장 (PDF 페이지 43) [cite: 1560]"""
         if not self.is_connected: return
-        data = struct.pack('B', 0x55) # 저장 명령을 위한 데이터, PDF 기반
+        data = self._BYTE.pack(0x55) # 저장 명령을 위한 데이터, PDF 기반
         self._send_packet(self.CMD_LIGHT_SAVE, data)
         logger.info("조명 설정 저장 명령 전송")
 
@@ -183,79 +284,177 @@ class XtarkR20Controller:
         """IMU 캘리브레이션 (PDF 페이지 42) [cite: 1549]"""
         if not self.is_connected: return
         logger.info("IMU 캘리브레이션 시작 (로봇을 평평한 곳에 정지 상태로 유지)")
-        data = struct.pack('B', 0x55) # 캘리브레이션 명령을 위한 데이터
+        data = self._BYTE.pack(0x55) # 캘리브레이션 명령을 위한 데이터
         self._send_packet(self.CMD_IMU_CALIBRATE, data)
 
+    # 발행된 스냅샷의 객체는 이후 수정되지 않으므로 잠금 없이 참조만 읽음
+    @property
+    def current_velocity(self) -> Velocity:
+        return self._cmd_vel
+    @property
+    def odometry_data(self) -> OdometryData:
+        return self._telemetry.odom
+    @property
+    def imu_data(self) -> IMUData:
+        return self._telemetry.imu
+    @property
+    def battery_voltage(self) -> float:
+        return self._telemetry.battery
+
     def get_odometry(self) -> OdometryData:
-        with self.data_lock: return self.odometry_data
+        return self._telemetry.odom
     def get_imu_data(self) -> IMUData:
-        with self.data_lock: return self.imu_data
+        return self._telemetry.imu
     def get_battery_voltage(self) -> float:
-        with self.data_lock: return self.battery_voltage
+        return self._telemetry.battery
     def get_current_velocity(self) -> Velocity:
-        with self.data_lock: return self.current_velocity
+        return self._cmd_vel
 
-    def _send_packet(self, cmd_id: int, data: bytes):
-        """데이터 패킷 생성 및 전송 (PDF 페이지 41) [cite: 1459]"""
+    def get_telemetry_snapshot(self) -> TelemetrySnapshot:
+        """속도/오도메트리/IMU/배터리를 한 시점 기준으로 일관되게 읽기
+
+        수신 스레드는 값을 제자리에서 바꾸지 않고 새 스냅샷으로 교체하므로
+        반환된 스냅샷 내용은 이후에도 바뀌지 않습니다.
+        """
+        snap, vel = self._telemetry, self._cmd_vel
+        return snap if snap.vel is vel else snap._replace(vel=vel)
+
+    def write_packet(self, packet: bytes):
+        """미리 생성한 패킷 전송 (rgb_light_packet 등, batched() 안에서는 모아서 전송)"""
         if not self.serial_conn or not self.is_connected: return
+        with self.tx_lock:
+            if self._tx_batch <= 1 and not self._tx_queue:
+                self._write(packet)
+                return
+            self._tx_queue.append(bytes(packet))  # 재사용 버퍼일 수 있으므로 복사
+            if len(self._tx_queue) >= self._tx_batch:
+                self.flush_tx()
+
+    def flush_tx(self):
+        """모아 둔 송신 패킷을 한 번의 write로 전송"""
+        with self.tx_lock:
+            if not self._tx_queue: return
+            data = b''.join(self._tx_queue)
+            self._tx_queue.clear()
+            self._write(data)
+
+    @contextmanager
+    def batched(self, n: int = 4):
+        """with 블록 안의 명령을 n개씩 모아 전송하고, 블록을 나갈 때 나머지를 전송"""
+        with self.tx_lock:
+            prev, self._tx_batch = self._tx_batch, n
+        try:
+            yield self
+        finally:
+            with self.tx_lock:
+                self._tx_batch = prev
+                self.flush_tx()
+
+    def _write(self, data: bytes):
         try:
-            data_len = len(data)
-            total_len = 5 + data_len
-            header = struct.pack('<BBBB', self.HEADER1, self.HEADER2, total_len, cmd_id)
-            packet_without_checksum = header + data
-            checksum = sum(bytearray(packet_without_checksum)) & 0xFF
-            packet = packet_without_checksum + struct.pack('B', checksum)
-            self.serial_conn.write(packet)
+            self.serial_conn.write(data)
         except serial.SerialException as e:
             logger.error(f"데이터 전송 실패: {e}")
 
+    def _build_packet(self, cmd_id: int, data: bytes) -> bytes:
+        """데이터 패킷 생성 (PDF 페이지 41) [cite: 1459]"""
+        data_len = len(data)
+        total_len = 5 + data_len
+        header = self._HDR.pack(self.HEADER1, self.HEADER2, total_len, cmd_id)
+        packet_without_checksum = header + data
+        checksum = sum(packet_without_checksum) & 0xFF
+        return packet_without_checksum + self._BYTE.pack(checksum)
+
+    def _send_packet(self, cmd_id: int, data: bytes):
+        """데이터 패킷 생성 및 전송 (_tx_buf에 제자리에서 작성하여 할당 없이 전송)"""
+        data_end = 4 + len(data)
+        with self.tx_lock:
+            buf = self._tx_buf
+            self._HDR.pack_into(buf, 0, self.HEADER1, self.HEADER2, data_end + 1, cmd_id)
+            buf[4:data_end] = data
+            view = memoryview(buf)
+            buf[data_end] = sum(view[:data_end]) & 0xFF
+            self.write_packet(view[:data_end + 1])
+
     def _start_receive_thread(self):
         """데이터 수신 스레드 시작"""
         self.is_running = True
+        self._rx_ready.clear()
         self.receive_thread = threading.Thread(target=self._receive_data, daemon=True)
         self.receive_thread.start()
         logger.info("데이터 수신 스레드 시작")
 
     def _receive_data(self):
-        """시리얼 데이터 수신 및 파싱 (PDF 페이지 41 프로토콜 기반) [cite: 1459]"""
-        buffer = bytearray()
+        """시리얼 데이터 수신 및 파싱 (PDF 페이지 41 프로토콜 기반) [cite: 1459]
+
+        고정 크기 버퍼에 읽고 시작/끝 인덱스만 옮기며 파싱합니다.
+        (패킷마다 버퍼를 잘라 새로 만들지 않음)
+        """
+        buf = bytearray(self.RX_BUF_SIZE)
+        view = memoryview(buf)
+        start = end = 0  # 미처리 데이터 구간 buf[start:end]
+        header = self._HEADER_SIG
+        spin_until = 0.0
+        self._rx_ready.set()
         while self.is_running:
             try:
-                if self.serial_conn.in_waiting > 0:
-                    buffer.extend(self.serial_conn.read(self.serial_conn.in_waiting))
-
-                while len(buffer) >= 5: # 최소 패킷 길이 (헤더+길이+ID+체크섬)
-                    header_index = buffer.find(bytes([self.HEADER1, self.HEADER2]))
+                # 뒤쪽 공간이 부족하면 미처리 데이터를 버퍼 앞으로 당김
+                if start > self.RX_BUF_SIZE // 2 or end == self.RX_BUF_SIZE:
+                    buf[:end - start] = buf[start:end]
+                    end -= start
+                    start = 0
+                # 패킷을 받은 직후 잠시는 다음 데이터를 바로 확인 (연속 수신 시 지연 감소)
+                n = 0
+                while not n and time.monotonic() < spin_until:
+                    n = self.serial_conn.in_waiting
+                if not n:
+                    # 1바이트 블로킹 읽기로 OS에서 대기 (timeout이면 빈 읽기)
+                    if not self.serial_conn.readinto(view[end:end + 1]):
+                        continue
+                    end += 1
+                    n = self.serial_conn.in_waiting
+                # 이미 도착한 나머지는 한 번에 읽음 (남는 데이터는 다음 반복에서)
+                n = min(n, self.RX_BUF_SIZE - end)
+                if n:
+                    end += self.serial_conn.readinto(view[end:end + n])
+
+                while end - start >= 5: # 최소 패킷 길이 (헤더+길이+ID+체크섬)
+                    header_index = buf.find(header, start, end)
                     if header_index == -1:
-                        buffer.clear(); break
+                        # 마지막 바이트는 다음 헤더의 첫 바이트일 수 있으므로 남김
+                        start = end - 1 if buf[end - 1] == self.HEADER1 else end
+                        break
                     
-                    buffer = buffer[header_index:]
-                    if len(buffer) < 4: break
+                    start = header_index
+                    if end - start < 4: break
 
-                    total_len = buffer[2]
-                    if len(buffer) < total_len: break
+                    total_len = buf[start + 2]
+                    if total_len < 5:  # 잘못된 길이: 다음 헤더부터 다시 탐색
+                        start += 1; continue
+                    if end - start < total_len: break
 
-                    packet = buffer[:total_len]
-                    
-                    calc_checksum = sum(packet[:-1]) & 0xFF
-                    recv_checksum = packet[-1]
+                    last = start + total_len - 1
+                    calc_checksum = sum(view[start:last]) & 0xFF
+                    recv_checksum = buf[last]
 
                     if calc_checksum == recv_checksum:
-                        cmd_id = packet[3]
-                        data = packet[4:-1]
+                        cmd_id = buf[start + 3]
+                        data = view[start + 4:last]
                         self._process_received_data(cmd_id, data)
+                        spin_until = time.monotonic() + self.RX_SPIN_TIME
 
-                    buffer = buffer[total_len:]
+                    start += total_len
                 
-                time.sleep(0.001)
+                if start == end:
+                    start = end = 0
             except Exception as e:
                 logger.error(f"데이터 수신 오류: {e}")
                 self.is_connected = False; break
 
     def _process_received_data(self, cmd_id: int, data: bytes):
         """수신된 데이터 처리 (PDF 페이지 42) [cite: 1487, 1536, 1541, 1543, 1544]"""
-        current_time = time.time()
-        dt = current_time - self.last_update_time
+        now_ns = time.monotonic_ns()
+        dt = (now_ns - self.last_update_ns) * 1e-9
 
         try:
             if cmd_id == self.ID_INTEGRATED_DATA and len(data) == 20:
@@ -263,38 +462,32 @@ class XtarkR20Controller:
                 # < 6h 3h H
                 # h: signed short (2 bytes)
                 # H: unsigned short (2 bytes)
-                raw_values = struct.unpack('<hhhhhhhhhH', data)
+                ax, ay, az, gx, gy, gz, vx, vy, vw, volt = self._INTEGRATED.unpack_from(data)
+                acc, gyro, vel = self._ACC_SCALE, self._GYRO_SCALE, self._VEL_SCALE
                 
-                with self.data_lock:
-                    # IMU 데이터 처리
-                    self.imu_data.accel_x = (raw_values[0] / 32768.0) * 2.0 * GRAVITY
-                    self.imu_data.accel_y = (raw_values[1] / 32768.0) * 2.0 * GRAVITY
-                    self.imu_data.accel_z = (raw_values[2] / 32768.0) * 2.0 * GRAVITY
-                    self.imu_data.gyro_x = (raw_values[3] / 32768.0) * 500.0 * (math.pi / 180.0)
-                    self.imu_data.gyro_y = (raw_values[4] / 32768.0) * 500.0 * (math.pi / 180.0)
-                    self.imu_data.gyro_z = (raw_values[5] / 32768.0) * 500.0 * (math.pi / 180.0)
-                    
-                    # 오도메트리 속도 데이터 처리
-                    self.odometry_data.vx = raw_values[6] / 1000.0
-                    self.odometry_data.vy = raw_values[7] / 1000.0
-                    self.odometry_data.vw = raw_values[8] / 1000.0
-                    
-                    # 오도메트리 위치 적분
-                    if dt > 0:
-                        delta_x = (self.odometry_data.vx * math.cos(self.odometry_data.theta) - self.odometry_data.vy * math.sin(self.odometry_data.theta)) * dt
-                        delta_y = (self.odometry_data.vx * math.sin(self.odometry_data.theta) + self.odometry_data.vy * math.cos(self.odometry_data.theta)) * dt
-                        delta_theta = self.odometry_data.vw * dt
-                        
-                        self.odometry_data.x += delta_x
-                        self.odometry_data.y += delta_y
-                        self.odometry_data.theta += delta_theta
-                    
-                    # 배터리 전압 처리
-                    self.battery_voltage = raw_values[9] / 100.0
+                # IMU 데이터 처리
+                imu = IMUData(ax * acc, ay * acc, az * acc,
+                              gx * gyro, gy * gyro, gz * gyro)
+                
+                # 오도메트리 속도 데이터 처리
+                moving = vx | vy | vw  # 원시값이 모두 0이면 정지 상태
+                vx, vy, vw = vx * vel, vy * vel, vw * vel
+                
+                # 오도메트리 위치 적분 (정지 중에는 위치가 변하지 않으므로 생략)
+                # 위치는 이 스레드만 갱신하므로 이전 값은 잠금 없이 읽어도 됨
+                prev = self._telemetry.odom
+                x, y, theta = prev.x, prev.y, prev.theta
+                if moving and dt > 0:
+                    x, y, theta = _integrate_pose(x, y, theta, vx, vy, vw, dt)
+                odom = OdometryData(x, y, theta, vx, vy, vw)
+                
+                # 배터리 전압 처리 후 새 스냅샷 발행
+                self._telemetry = TelemetrySnapshot(self._cmd_vel, odom, imu,
+                                                    volt * self._VOLT_SCALE)
         except struct.error as e:
             logger.error(f"데이터 파싱 오류 (ID: {cmd_id}): {e}")
         
-        self.last_update_time = current_time
+        self.last_update_ns = now_ns
 
     def __enter__(self):
         if self.connect(): return self